@@ -1,14 +1,38 @@
+import os
+from collections import deque
+from contextlib import suppress
+
 import streamlit as st
 # Import everything needed from oracle_engine.py
 from oracle_engine import (
     MIN_HISTORY_FOR_PREDICTION, MAX_HISTORY_FOR_ANALYSIS, # MAX_HISTORY_FOR_ANALYSIS is used in get_latest_history_string
     PREDICTION_THRESHOLD, COUNTER_PREDICTION_THRESHOLD,
-    get_outcome_emoji, get_latest_history_string,
-    analyze_dna_pattern, analyze_momentum, analyze_intuition, predict_outcome
+    ANALYZER_REGISTRY, get_outcome_emoji, enable_metrics, get_metrics
 )
+from oracle_ledger import new_stats
+from oracle_service import ServiceClient, TableRegistry
 
 # --- Configuration for app.py (UI specific, from V1.13) ---
 MAX_HISTORY_DISPLAY = 50 # Max history to store and display in UI (remains in app.py)
+NOT_RUN = "ไม่ได้คำนวณ" # Debug text for an analyzer the registry did not need to run
+BEAD_PLATE_ROWS = 6 # Hands per bead plate column, as on a table's scoreboard
+BEAD_PLATE_COLUMNS = 12 # Columns fetched and drawn at a time, however many hands the table has
+# URL of a running oracle_service.py (e.g. http://127.0.0.1:8765); unset = tables kept in this process
+ORACLE_SERVICE_URL = os.environ.get("ORACLE_SERVICE_URL")
+# Directory for the in-process tables' hand ledgers; unset = stats are lost on restart
+ORACLE_LEDGER_DIR = os.environ.get("ORACLE_LEDGER_DIR")
+# Set (e.g. to 1) to collect engine metrics for the in-process tables, like the service's --metrics
+ORACLE_METRICS = os.environ.get("ORACLE_METRICS")
+
+
+@st.cache_resource
+def get_tables():
+    # Table state lives in the service (or one in-process registry), not in st.session_state
+    if ORACLE_SERVICE_URL:
+        return ServiceClient(ORACLE_SERVICE_URL)
+    if ORACLE_METRICS and get_metrics() is None: # Once per process, for every session
+        enable_metrics()
+    return TableRegistry(history_limit=MAX_HISTORY_DISPLAY, ledger_dir=ORACLE_LEDGER_DIR)
 
 
 # --- Page Configuration ---
@@ -20,217 +44,259 @@ st.set_page_config(
 )
 
 # --- Session State Initialization ---
-if 'history' not in st.session_state:
-    st.session_state.history = []
-if 'total_predictions' not in st.session_state:
-    st.session_state.total_predictions = 0
-if 'correct_predictions' not in st.session_state:
-    st.session_state.correct_predictions = 0
-if 'correct_counter_predictions' not in st.session_state:
-    st.session_state.correct_counter_predictions = 0
-if 'total_counter_predictions' not in st.session_state:
-    st.session_state.total_counter_predictions = 0
-if 'last_prediction_data' not in st.session_state:
-    st.session_state.last_prediction_data = None # Stores data of the last prediction made
-if 'prediction_counts' not in st.session_state:
-    st.session_state.prediction_counts = {} # {'P': count, 'B': count}
-if 'prediction_wins' not in st.session_state:
-    st.session_state.prediction_wins = {} # {'P': wins, 'B': wins}
-if 'counter_streak_count' not in st.session_state:
-    st.session_state.counter_streak_count = 0 # Streak of wins when countering
+if 'table_id' not in st.session_state:
+    st.session_state.table_id = "1" # Table this session is following
 
 # --- UI Functions (from V1.13) ---
+# Scoring the shown prediction, undo and reset happen in oracle_service.TableState.
+# A table only exists once its first hand is recorded; until then undo and reset do nothing.
 
 def record_outcome(outcome):
-    if st.session_state.last_prediction_data:
-        predicted_outcome = st.session_state.last_prediction_data['prediction']
-        is_counter = st.session_state.last_prediction_data['is_counter']
-
-        if predicted_outcome not in ["ไม่เพียงพอ", "ไม่พบรูปแบบ", "ไม่ชัดเจน"]:
-            st.session_state.total_predictions += 1
-            if predicted_outcome == outcome:
-                st.session_state.correct_predictions += 1
-                if is_counter:
-                    st.session_state.counter_streak_count += 1
-                else:
-                    st.session_state.counter_streak_count = 0
-            else:
-                st.session_state.counter_streak_count = 0
-
-            st.session_state.prediction_counts[predicted_outcome] = st.session_state.prediction_counts.get(predicted_outcome, 0) + 1
-            if predicted_outcome == outcome:
-                st.session_state.prediction_wins[predicted_outcome] = st.session_state.prediction_wins.get(predicted_outcome, 0) + 1
-
-            if is_counter:
-                st.session_state.total_counter_predictions += 1
-                if predicted_outcome == outcome:
-                    st.session_state.correct_counter_predictions += 1
-
-    st.session_state.history.append({'main_outcome': outcome, 'timestamp': st.session_state.get('current_timestamp', 'N/A')})
-    if len(st.session_state.history) > MAX_HISTORY_DISPLAY:
-        st.session_state.history = st.session_state.history[-MAX_HISTORY_DISPLAY:]
-    
-    st.session_state.last_prediction_data = None
+    get_tables().push(st.session_state.table_id, outcome)
 
 
 def delete_last_outcome():
-    if st.session_state.history:
-        if st.session_state.last_prediction_data:
-            predicted_outcome_for_deleted_hand = st.session_state.last_prediction_data['prediction']
-            is_counter_for_deleted_hand = st.session_state.last_prediction_data['is_counter']
-            
-            if predicted_outcome_for_deleted_hand not in ["ไม่เพียงพอ", "ไม่พบรูปแบบ", "ไม่ชัดเจน"]:
-                deleted_actual_outcome = st.session_state.history[-1]['main_outcome']
-
-                st.session_state.total_predictions = max(0, st.session_state.total_predictions - 1)
-                
-                if predicted_outcome_for_deleted_hand == deleted_actual_outcome:
-                    st.session_state.correct_predictions = max(0, st.session_state.correct_predictions - 1)
-                    if is_counter_for_deleted_hand:
-                        st.session_state.counter_streak_count = max(0, st.session_state.counter_streak_count - 1)
-                else:
-                    pass 
-
-                st.session_state.prediction_counts[predicted_outcome_for_deleted_hand] = \
-                    max(0, st.session_state.prediction_counts.get(predicted_outcome_for_deleted_hand, 0) - 1)
-                if predicted_outcome_for_deleted_hand == deleted_actual_outcome:
-                    st.session_state.prediction_wins[predicted_outcome_for_deleted_hand] = \
-                        max(0, st.session_state.prediction_wins.get(predicted_outcome_for_deleted_hand, 0) - 1)
-
-                if is_counter_for_deleted_hand:
-                    st.session_state.total_counter_predictions = max(0, st.session_state.total_counter_predictions - 1)
-                    if predicted_outcome_for_deleted_hand == deleted_actual_outcome:
-                        st.session_state.correct_counter_predictions = max(0, st.session_state.correct_counter_predictions - 1)
-        
-        st.session_state.history.pop()
-        st.session_state.last_prediction_data = None
+    with suppress(KeyError):
+        get_tables().undo(st.session_state.table_id)
 
 
 def reset_system():
-    st.session_state.history = []
-    st.session_state.total_predictions = 0
-    st.session_state.correct_predictions = 0
-    st.session_state.correct_counter_predictions = 0
-    st.session_state.total_counter_predictions = 0
-    st.session_state.last_prediction_data = None
-    st.session_state.prediction_counts = {}
-    st.session_state.prediction_wins = {}
-    st.session_state.counter_streak_count = 0
+    with suppress(KeyError):
+        get_tables().reset(st.session_state.table_id)
     st.rerun()
 
-# --- Main App Layout ---
-st.title("🔮 ORACLE Final V1.13 (Split Files)") # UI Title reflects V1.13
-st.markdown("ระบบทำนายแนวโน้มบาคาร่า (สำหรับบันทึกผลด้วยตนเอง)")
 
-# History Display
-st.subheader("📋 ประวัติผลลัพธ์")
-if st.session_state.history:
-    history_emojis = [get_outcome_emoji(h['main_outcome']) for h in st.session_state.history]
-    history_display = "".join(history_emojis)
-    
-    # This is the V1.13 style display for history (long string)
-    st.markdown(f"<p style='font-size: 1.5em; overflow-x: auto; white-space: nowrap;'>{history_display}</p>", unsafe_allow_html=True)
-    
-    st.markdown(f"**จำนวนตาที่บันทึก: {len(st.session_state.history)}**")
-else:
-    st.write("ยังไม่มีประวัติ กรุณาเริ่มบันทึกผล")
-
-# Prediction Display
-st.subheader("🧠 ผลการวิเคราะห์และทำนาย")
-
-# Call predict_outcome from oracle_engine, passing the history list
-current_prediction = predict_outcome(st.session_state.history)
-st.session_state.last_prediction_data = current_prediction # Store for later use when outcome is recorded
-
-pred_emoji = get_outcome_emoji(current_prediction['prediction']) if current_prediction['prediction'] in ['P', 'B', 'T'] else "❓"
-confidence_percent = f"{current_prediction['confidence']*100:.1f}%"
-
-prediction_text = f"**ผลวิเคราะห์: {pred_emoji} {current_prediction['prediction']}** (ความมั่นใจ: {confidence_percent})"
-
-# Display prediction source and counter status if available
-if current_prediction.get('predicted_by'):
-    predicted_by_str = ", ".join(current_prediction['predicted_by'])
-    prediction_text += f"\n*ทำนายโดย: {predicted_by_str}*"
-    if current_prediction.get('is_counter', False):
-        prediction_text += " (สวน)"
-
-# Display appropriate message based on prediction status
-if len(st.session_state.history) < MIN_HISTORY_FOR_PREDICTION:
-    st.warning(f"บันทึกประวัติอย่างน้อย {MIN_HISTORY_FOR_PREDICTION} ตา เพื่อเริ่มการทำนาย (ปัจจุบัน: {len(st.session_state.history)} ตา)")
-elif current_prediction['prediction'] == "ไม่พบรูปแบบ":
-    st.info("ระบบยังไม่พบรูปแบบที่ชัดเจนในการทำนาย")
-elif current_prediction['prediction'] == "ไม่ชัดเจน":
-    st.warning(f"รูปแบบยังไม่ชัดเจนพอ (ความมั่นใจ {confidence_percent} < {PREDICTION_THRESHOLD*100:.0f}%)")
-else:
-    if current_prediction.get('is_counter', False):
-        st.success(prediction_text)
+def table_snapshot(table_id):
+    # The table's snapshot, or None before its first hand
+    try:
+        return get_tables().snapshot(table_id)
+    except KeyError:
+        return None
+
+
+def history_beads(table_id, history, hands):
+    # Emoji beads of the history, kept in session state between reruns: a new hand appends one
+    # bead (dropping the oldest once the window is full) and an undo removes one, so a click
+    # never rebuilds the whole strip. history: the last len(history) of the table's `hands` hands
+    first = hands - len(history)
+    cache = st.session_state.get("_history_beads")
+    beads = None
+    if cache is not None and cache["table"] == table_id and 0 <= first - cache["first"] <= len(cache["history"]):
+        dropped = first - cache["first"]
+        kept = cache["history"][dropped:]
+        if history.startswith(kept): # Hands added
+            beads = cache["beads"]
+            for _ in range(dropped):
+                beads.popleft()
+            beads.extend(get_outcome_emoji(outcome) for outcome in history[len(kept):])
+        elif not dropped and kept.startswith(history): # Hands undone
+            beads = cache["beads"]
+            for _ in range(len(kept) - len(history)):
+                beads.pop()
+    if beads is None: # Another table, a reset, or an undo that brought older hands back
+        beads = deque(get_outcome_emoji(outcome) for outcome in history)
+    st.session_state["_history_beads"] = {"table": table_id, "first": first, "history": history, "beads": beads}
+    return beads
+
+
+def bead_plate(table_id, hands):
+    # The table's whole ledger as a bead plate (columns of BEAD_PLATE_ROWS hands, oldest first).
+    # Only one window of BEAD_PLATE_COLUMNS columns is fetched and drawn; it follows the newest
+    # hands unless the user pages back.
+    columns = -(-hands // BEAD_PLATE_ROWS)
+    first_column = max(0, columns - BEAD_PLATE_COLUMNS)
+    if first_column and st.toggle("ดูย้อนหลัง", key="bead_plate_browse"):
+        first_column = st.slider("คอลัมน์แรก", 1, first_column + 1, first_column + 1) - 1
+    start = first_column * BEAD_PLATE_ROWS
+    outcomes = get_tables().hands(table_id, start, start + BEAD_PLATE_COLUMNS * BEAD_PLATE_ROWS)["outcomes"]
+    cells = "".join(f"<span>{get_outcome_emoji(outcome)}</span>" for outcome in outcomes)
+    st.markdown(f"<div style='display: grid; grid-template-rows: repeat({BEAD_PLATE_ROWS}, 1.6em); grid-auto-flow: column; "
+                f"grid-auto-columns: 1.6em; font-size: 1.2em;'>{cells}</div>", unsafe_allow_html=True)
+    st.caption(f"คอลัมน์ {first_column + 1}-{min(columns, first_column + BEAD_PLATE_COLUMNS)} จาก {columns} ({hands} ตา)")
+
+
+# --- Table View ---
+# A fragment: pressing P/B/T or undo reruns only this part (history, prediction, stats),
+# not the whole script.
+
+@st.fragment
+def table_view():
+    table_id = st.session_state.table_id
+    table = table_snapshot(table_id) or {
+        "hands": 0, "history": "", "stats": new_stats(),
+        "prediction": {"prediction": "ไม่เพียงพอ", "confidence": 0, "predicted_by": [], "is_counter": False}}
+    history = table["history"]
+    stats = table["stats"]
+
+    # History Display
+    st.subheader("📋 ประวัติผลลัพธ์")
+    if history:
+        history_display = "".join(history_beads(table_id, history, table["hands"]))
+
+        # This is the V1.13 style display for history (long string)
+        st.markdown(f"<p style='font-size: 1.5em; overflow-x: auto; white-space: nowrap;'>{history_display}</p>", unsafe_allow_html=True)
+
+        st.markdown(f"**จำนวนตาที่บันทึก: {len(history)}**")
+        bead_plate(table_id, table["hands"])
     else:
-        st.info(prediction_text)
-
-# Record Outcome Buttons
-st.subheader("➕ บันทึกผลลัพธ์")
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.button("🟦 P", on_click=record_outcome, args=('P',))
-with col2:
-    st.button("🟥 B", on_click=record_outcome, args=('B',))
-with col3:
-    st.button("⚪️ T", on_click=record_outcome, args=('T',))
-with col4:
-    st.button("❌ ลบล่าสุด", on_click=delete_last_outcome)
+        st.write("ยังไม่มีประวัติ กรุณาเริ่มบันทึกผล")
 
-st.markdown("---")
+    # Prediction Display
+    st.subheader("🧠 ผลการวิเคราะห์และทำนาย")
 
-# Performance Statistics
-st.subheader("📊 สถิติประสิทธิภาพ (รวม)")
+    # Prediction for the next hand, kept up to date by the table's OracleStream
+    current_prediction = table["prediction"]
 
-total_preds_display = st.session_state.total_predictions
-correct_preds_display = st.session_state.correct_predictions
-accuracy = (correct_preds_display / total_preds_display * 100) if total_preds_display > 0 else 0
+    pred_emoji = get_outcome_emoji(current_prediction['prediction']) if current_prediction['prediction'] in ['P', 'B', 'T'] else "❓"
+    confidence_percent = f"{current_prediction['confidence']*100:.1f}%"
 
-st.write(f"**🎯 ความแม่นยำ (รวม): {accuracy:.1f}%** ({correct_preds_display}/{total_preds_display} ครั้ง)")
+    prediction_text = f"**ผลวิเคราะห์: {pred_emoji} {current_prediction['prediction']}** (ความมั่นใจ: {confidence_percent})"
 
-if st.session_state.total_counter_predictions > 0:
-    counter_accuracy = (st.session_state.correct_counter_predictions / st.session_state.total_counter_predictions * 100)
-    st.write(f"**🎯 ความแม่นยำ (สวน): {counter_accuracy:.1f}%** ({st.session_state.correct_counter_predictions}/{st.session_state.total_counter_predictions} ครั้ง)")
-    if st.session_state.correct_counter_predictions > 0 and st.session_state.total_counter_predictions > 0:
-        st.write(f"🔥 สวนสูตรชนะต่อเนื่อง: **{st.session_state.counter_streak_count}** ครั้ง")
+    # Display prediction source and counter status if available
+    if current_prediction.get('predicted_by'):
+        predicted_by_str = ", ".join(current_prediction['predicted_by'])
+        prediction_text += f"\n*ทำนายโดย: {predicted_by_str}*"
+        if current_prediction.get('is_counter', False):
+            prediction_text += " (สวน)"
 
+    # Display appropriate message based on prediction status
+    if len(history) < MIN_HISTORY_FOR_PREDICTION:
+        st.warning(f"บันทึกประวัติอย่างน้อย {MIN_HISTORY_FOR_PREDICTION} ตา เพื่อเริ่มการทำนาย (ปัจจุบัน: {len(history)} ตา)")
+    elif current_prediction['prediction'] == "ไม่พบรูปแบบ":
+        st.info("ระบบยังไม่พบรูปแบบที่ชัดเจนในการทำนาย")
+    elif current_prediction['prediction'] == "ไม่ชัดเจน":
+        st.warning(f"รูปแบบยังไม่ชัดเจนพอ (ความมั่นใจ {confidence_percent} < {PREDICTION_THRESHOLD*100:.0f}%)")
+    else:
+        if current_prediction.get('is_counter', False):
+            st.success(prediction_text)
+        else:
+            st.info(prediction_text)
+
+    # Record Outcome Buttons
+    st.subheader("➕ บันทึกผลลัพธ์")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.button("🟦 P", on_click=record_outcome, args=('P',))
+    with col2:
+        st.button("🟥 B", on_click=record_outcome, args=('B',))
+    with col3:
+        st.button("⚪️ T", on_click=record_outcome, args=('T',))
+    with col4:
+        st.button("❌ ลบล่าสุด", on_click=delete_last_outcome)
+
+    st.markdown("---")
+
+    # Performance Statistics
+    st.subheader("📊 สถิติประสิทธิภาพ (รวม)")
+
+    total_preds_display = stats["total_predictions"]
+    correct_preds_display = stats["correct_predictions"]
+    accuracy = (correct_preds_display / total_preds_display * 100) if total_preds_display > 0 else 0
+
+    st.write(f"**🎯 ความแม่นยำ (รวม): {accuracy:.1f}%** ({correct_preds_display}/{total_preds_display} ครั้ง)")
+
+    if stats["total_counter_predictions"] > 0:
+        counter_accuracy = (stats["correct_counter_predictions"] / stats["total_counter_predictions"] * 100)
+        st.write(f"**🎯 ความแม่นยำ (สวน): {counter_accuracy:.1f}%** ({stats['correct_counter_predictions']}/{stats['total_counter_predictions']} ครั้ง)")
+        if stats["correct_counter_predictions"] > 0 and stats["total_counter_predictions"] > 0:
+            st.write(f"🔥 สวนสูตรชนะต่อเนื่อง: **{stats['counter_streak_count']}** ครั้ง")
+
+
+    st.subheader("📈 สถิติแยกตามผลลัพธ์ที่ทำนาย")
+    if stats["prediction_counts"]:
+        for outcome, count in stats["prediction_counts"].items():
+            wins = stats["prediction_wins"].get(outcome, 0)
+            outcome_accuracy = (wins / count * 100) if count > 0 else 0
+            st.write(f"- ทำนาย {get_outcome_emoji(outcome)} {outcome}: **{outcome_accuracy:.1f}%** ({wins}/{count} ครั้ง)")
+    else:
+        st.write("ยังไม่มีสถิติการทำนาย")
 
-st.subheader("📈 สถิติแยกตามผลลัพธ์ที่ทำนาย")
-if st.session_state.prediction_counts:
-    for outcome, count in st.session_state.prediction_counts.items():
-        wins = st.session_state.prediction_wins.get(outcome, 0)
-        outcome_accuracy = (wins / count * 100) if count > 0 else 0
-        st.write(f"- ทำนาย {get_outcome_emoji(outcome)} {outcome}: **{outcome_accuracy:.1f}%** ({wins}/{count} ครั้ง)")
-else:
-    st.write("ยังไม่มีสถิติการทำนาย")
 
-st.markdown("---")
+# --- Developer View ---
+# Also a fragment. Nothing is fetched or analyzed until its toggle is on, so the closed panel
+# costs nothing per click; it shows the table as of its own last run (🔄 to refresh).
 
-st.button("🔄 รีเซ็ตระบบทั้งหมด", on_click=reset_system)
+@st.fragment
+def developer_view():
+    if not st.toggle("โหลดข้อมูลนักพัฒนา", key="developer_view"):
+        return
+    st.button("🔄 รีเฟรช")
+    table = table_snapshot(st.session_state.table_id)
+    if table is None:
+        st.write("โต๊ะนี้ยังไม่มีผลที่บันทึก")
+        return
+    history = table["history"]
+    current_prediction = table["prediction"]
 
-# Developer View (Expandable Section) - This section remains for debugging purposes
-with st.expander("🧬 มุมมองนักพัฒนา"):
     st.write("---")
     st.write("**สถานะ Session State:**")
-    st.json(st.session_state.to_dict())
-    
+    st.json({key: value for key, value in st.session_state.to_dict().items() if not key.startswith("_")})
+    st.write("**สถานะโต๊ะ:**")
+    st.json(table)
+
     st.write("---")
     st.write("**ประวัติ (สำหรับวิเคราะห์ DNA):**")
-    st.write(get_latest_history_string(st.session_state.history))
+    st.write(history[-MAX_HISTORY_FOR_ANALYSIS:])
 
     st.write("---")
+    # The results the table's own prediction was combined from (nothing is re-analyzed here)
     st.write("**ผลลัพธ์จากการวิเคราะห์แต่ละส่วน (Debug):**")
-    debug_history_str = get_latest_history_string(st.session_state.history)
-    
-    st.write(f"DNA Analysis: {analyze_dna_pattern(debug_history_str)}")
-    st.write(f"Momentum Analysis: {analyze_momentum(debug_history_str)}")
-    st.write(f"Intuition Analysis: {analyze_intuition(debug_history_str)}")
+    analysis = table["analysis"]
+    for name in ANALYZER_REGISTRY.names():
+        st.write(f"{name} Analysis: {analysis.get(name) or NOT_RUN}")
+    st.write("**บริบทของสัญญาณจากประวัติทั้งขอน (DNAContext, NGram):**")
+    dna_context = table["signals"]["dna_context"]
+    st.write(f"DNAContext (รูปแบบยาว {dna_context['length']}): {dna_context['result']} {dna_context['followers']}")
+    ngram = table["signals"]["ngram"]
+    ngram_weights = {outcome: round(weight, 2) for outcome, weight in ngram["followers"].items()}
+    st.write(f"NGram (ถ่วงน้ำหนักตามเวลา, บริบทยาว {ngram['length']}): {ngram['result']} {ngram_weights}")
+    st.write("**เส้นรอง (แสดงอย่างเดียว ไม่ได้ใช้ทำนาย):**")
+    for road_name, road_result in table["signals"]["derived_roads"].items():
+        st.write(f"{road_name}: {road_result}")
+
+    st.write("---")
+    st.write("**Engine metrics (เวลาและจำนวนครั้งของแต่ละตัววิเคราะห์):**")
+    if ORACLE_SERVICE_URL: # Collected by the service process (oracle_service.py --metrics)
+        try:
+            metrics_text = get_tables().metrics_text()
+        except ValueError:
+            metrics_text = ""
+            st.write("service ไม่ได้เปิด --metrics")
+    elif get_metrics() is None: # Collection is only switched on at start-up (ORACLE_METRICS)
+        metrics_text = ""
+        st.write("ไม่ได้เก็บ metrics (ตั้ง ORACLE_METRICS=1 ก่อนเริ่ม app)")
+    elif st.checkbox("แสดง metrics (ทุก session ในโปรเซสนี้)"):
+        engine_metrics = get_metrics()
+        st.dataframe(engine_metrics.summary(), hide_index=True)
+        st.write(f"ผลการทำนาย: {engine_metrics.results} | สวนสูตร (short-circuit): {engine_metrics.counter_overrides} ครั้ง")
+        metrics_text = engine_metrics.prometheus()
+    else:
+        metrics_text = ""
+    if metrics_text and st.checkbox("แสดงแบบ Prometheus text"):
+        st.code(metrics_text, language="text")
 
     st.write("---")
     st.write("**Predicted by (Debugging the KeyError location):**")
-    if st.session_state.last_prediction_data and st.session_state.last_prediction_data.get('predicted_by') is not None:
-        st.write(f"st.session_state.last_prediction_data['predicted_by']: {st.session_state.last_prediction_data.get('predicted_by')}")
+    if current_prediction.get('predicted_by') is not None:
+        st.write(f"table['prediction']['predicted_by']: {current_prediction.get('predicted_by')}")
     else:
-        st.write("st.session_state.last_prediction_data หรือ 'predicted_by' key ไม่มีอยู่")
+        st.write("table['prediction'] หรือ 'predicted_by' key ไม่มีอยู่")
+
+
+# --- Main App Layout ---
+st.title("🔮 ORACLE Final V1.13 (Split Files)") # UI Title reflects V1.13
+st.markdown("ระบบทำนายแนวโน้มบาคาร่า (สำหรับบันทึกผลด้วยตนเอง)")
+st.text_input("โต๊ะ", key="table_id")
+if not st.session_state.table_id.strip():
+    st.warning("กรุณาระบุโต๊ะ")
+    st.stop()
+
+table_view()
+
+st.markdown("---")
+
+st.button("🔄 รีเซ็ตระบบทั้งหมด", on_click=reset_system)
+
+# Developer View (Expandable Section) - This section remains for debugging purposes
+with st.expander("🧬 มุมมองนักพัฒนา"):
+    developer_view()
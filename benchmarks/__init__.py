@@ -0,0 +1 @@
+# Benchmarks for oracle_engine and app.py: python -m benchmarks.run
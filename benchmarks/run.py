@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from oracle_engine import (
+    analyze_dna_pattern, analyze_momentum, analyze_intuition, predict_outcome,
+    History, OracleStream, DNAIndex, NGramModel, PredictionCache
+)
+from benchmarks.shoes import SHOE_KINDS, generate_shoe, generate_shoes
+
+# --- Benchmark Runner ---
+#   python -m benchmarks.run                    # run, compare with benchmarks/baseline.json
+#   python -m benchmarks.run --save-baseline    # run and store the results as the new baseline
+#   python -m benchmarks.run --only analyzer.   # only benchmarks whose name starts with a prefix
+# Every result is {"value", "unit", "better": "lower"|"higher"}. A result worse than its
+# baseline by more than --tolerance is a regression and makes the run exit with status 1.
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+HISTORY_LENGTHS = (15, 30, 100, 1_000, 10_000, 100_000)
+REPLAY_SHOES = 100 # Shoes per kind for the end-to-end runs
+REPLAY_HANDS = 80 # Hands per shoe (a full 8-deck shoe)
+APP_REPLAY_HANDS = 40
+LEDGER_REPLAY_HANDS = 1_000_000
+
+def _time_per_call(func, min_time=0.05, repeat=3):
+    # Best of `repeat` runs, each calling func until min_time has passed
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+def _record(results, name, value, unit, better):
+    results[name] = {"value": value, "unit": unit, "better": better}
+
+# -- Benchmarks --
+
+def bench_analyzers(results):
+    # Cost of one call per analyzer on histories of increasing length
+    for kind in ("iid", "streaky"):
+        for length in HISTORY_LENGTHS:
+            history_str = generate_shoe(kind, length)
+            history = History(history_str)
+            dna_index = DNAIndex(history_str)
+            calls = {
+                "analyze_dna_pattern": lambda: analyze_dna_pattern(history_str),
+                "analyze_momentum": lambda: analyze_momentum(history_str),
+                "analyze_intuition": lambda: analyze_intuition(history_str),
+                "DNAIndex.analyze": dna_index.analyze,
+                "predict_outcome": lambda: predict_outcome(history), # Analysis window only
+            }
+            for name, call in calls.items():
+                _record(results, f"analyzer.{name}.{kind}.{length}", _time_per_call(call), "s", "lower")
+
+def _replay_predict_outcome(shoes):
+    for shoe in shoes:
+        history = []
+        for outcome in shoe:
+            predict_outcome(history)
+            history.append({'main_outcome': outcome, 'timestamp': 'N/A'})
+
+def _replay_stream(shoes):
+    for shoe in shoes:
+        stream = OracleStream(max_length=50)
+        for outcome in shoe:
+            stream.push(outcome)
+
+def _replay_cache(shoes):
+    cache = PredictionCache()
+    for shoe in shoes:
+        history = History(max_length=50)
+        for outcome in shoe:
+            cache.predict(history)
+            history.append(outcome)
+
+def bench_end_to_end(results):
+    # Predictions per second when replaying whole shoes hand by hand
+    try:
+        from oracle_backtest import backtest, encode_shoes
+    except ImportError: # numpy not installed
+        backtest = None
+    for kind in SHOE_KINDS:
+        shoes = generate_shoes(kind, REPLAY_SHOES, REPLAY_HANDS)
+        hands = sum(len(shoe) for shoe in shoes)
+        replays = {"predict_outcome": _replay_predict_outcome, "oracle_stream": _replay_stream,
+                   "prediction_cache": _replay_cache}
+        if backtest is not None:
+            encoded = encode_shoes(shoes)
+            replays["backtest"] = lambda shoes: backtest(encoded)
+        for name, replay in replays.items():
+            seconds = _time_per_call(lambda: replay(shoes), min_time=0.2)
+            _record(results, f"e2e.{name}.{kind}", hands / seconds, "predictions/s", "higher")
+
+def bench_memory(results):
+    # Peak traced allocation while one table records a shoe: the outcome store,
+    # the streaming predictor and the long-context DNA index
+    for hands in (REPLAY_HANDS, 100_000):
+        shoe = generate_shoe("iid", hands)
+        tracemalloc.start()
+        history = History()
+        stream = OracleStream(max_length=50)
+        dna_index = DNAIndex()
+        for outcome in shoe:
+            history.append(outcome, time.time())
+            stream.push(outcome)
+            dna_index.push(outcome)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _record(results, f"memory.table.{hands}", peak, "bytes", "lower")
+
+def bench_ledger(results):
+    # Appending hands to a table's ledger, and rebuilding the stats of a million-hand log
+    from oracle_ledger import HandLedger, replay_stats
+    shoe = generate_shoe("iid", REPLAY_HANDS * REPLAY_SHOES)
+    stream = OracleStream(max_length=50)
+    events = [(outcome, stream.push(outcome)) for outcome in shoe]
+    ledger = HandLedger()
+    def append_all():
+        ledger.reset()
+        for outcome, prediction in events:
+            ledger.append(outcome, prediction)
+    _record(results, "ledger.append", _time_per_call(append_all) / len(events), "s", "lower")
+    records = ledger.records()
+    log = records.repeat(-(-LEDGER_REPLAY_HANDS // len(records)))[:LEDGER_REPLAY_HANDS]
+    _record(results, f"ledger.replay.{LEDGER_REPLAY_HANDS}", _time_per_call(lambda: replay_stats(log)), "s", "lower")
+    ledger.close()
+
+def bench_ngram(results):
+    # Per-hand update of the decayed n-gram model, and a checkpoint/restore round trip
+    shoe = generate_shoe("iid", REPLAY_HANDS * REPLAY_SHOES)
+    def push_all():
+        model = NGramModel()
+        for outcome in shoe:
+            model.push(outcome)
+    _record(results, "ngram.push", _time_per_call(push_all) / len(shoe), "s", "lower")
+    model = NGramModel(shoe)
+    _record(results, "ngram.analyze", _time_per_call(model.analyze), "s", "lower")
+    _record(results, "ngram.checkpoint_restore", _time_per_call(lambda: NGramModel.restore(model.checkpoint())),
+            "s", "lower")
+
+def bench_app(results):
+    # Headless replay of app.py: one button click (record_outcome + rerun) per hand
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit not installed, skipping app benchmarks", file=sys.stderr)
+        return
+    shoe = generate_shoe("iid", APP_REPLAY_HANDS)
+    app = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    start = time.perf_counter()
+    for outcome in shoe:
+        app.button["PBT".index(outcome)].click().run() # Buttons: P, B, T, undo
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"app.py raised during replay: {app.exception}")
+    _record(results, "app.record_outcome_rerun", elapsed / len(shoe), "s", "lower")
+
+BENCHMARKS = {"analyzer": bench_analyzers, "e2e": bench_end_to_end, "memory": bench_memory,
+              "ledger": bench_ledger, "ngram": bench_ngram, "app": bench_app}
+
+# -- Baseline comparison --
+
+def compare(results, baseline, tolerance):
+    # Returns the names of the results that regressed
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"  new       {name}: {result['value']:.6g} {result['unit']}", file=sys.stderr)
+            continue
+        if result["better"] == "lower":
+            ratio = result["value"] / reference["value"] if reference["value"] else 1.0
+        else:
+            ratio = reference["value"] / result["value"] if result["value"] else float("inf")
+        status = "REGRESSED" if ratio > 1 + tolerance else "ok"
+        if status != "ok":
+            regressions.append(name)
+        print(f"  {status:<9} {name}: {result['value']:.6g} {result['unit']} "
+              f"(baseline {reference['value']:.6g}, x{ratio:.2f} cost)", file=sys.stderr)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Oracle engine and app")
+    parser.add_argument("--only", default="", help="Run only benchmarks whose name starts with this prefix")
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before a result counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for prefix, benchmark in BENCHMARKS.items():
+        if prefix.startswith(args.only) or args.only.startswith(prefix):
+            print(f"running {benchmark.__name__}...", file=sys.stderr)
+            benchmark(results)
+    results = {name: result for name, result in results.items() if name.startswith(args.only)}
+
+    report = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline): # Keep the entries this run did not cover (--only)
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": baseline}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import random
+
+# --- Synthetic Shoe Generators ---
+# Seeded outcome strings ("PBT...") with different shapes, so benchmark runs are repeatable
+# and exercise the analyzers' best and worst cases (long streaks, ping-pong, many ties).
+
+BACCARAT_ODDS = {'P': 0.4462, 'B': 0.4586, 'T': 0.0952} # Per-hand odds of an 8-deck shoe
+
+def _iid(rng, hands, odds=BACCARAT_ODDS):
+    return "".join(rng.choices(list(odds), weights=list(odds.values()), k=hands))
+
+def _streaky(rng, hands):
+    # P/B runs with a mean length of ~4, occasional ties
+    outcomes = []
+    outcome = rng.choice("PB")
+    while len(outcomes) < hands:
+        outcomes.extend(outcome * min(int(rng.expovariate(0.25)) + 1, 20))
+        if rng.random() < 0.1:
+            outcomes.append('T')
+        outcome = 'P' if outcome == 'B' else 'B'
+    return "".join(outcomes[:hands])
+
+def _choppy(rng, hands):
+    # Mostly alternating P/B (ping-pong), switching 80% of the time
+    outcomes = []
+    outcome = rng.choice("PB")
+    for _ in range(hands):
+        if rng.random() < 0.05:
+            outcomes.append('T')
+            continue
+        outcomes.append(outcome)
+        if rng.random() < 0.8:
+            outcome = 'P' if outcome == 'B' else 'B'
+    return "".join(outcomes)
+
+def _tie_heavy(rng, hands):
+    return _iid(rng, hands, {'P': 0.375, 'B': 0.375, 'T': 0.25})
+
+SHOE_KINDS = {"iid": _iid, "streaky": _streaky, "choppy": _choppy, "tie_heavy": _tie_heavy}
+
+def generate_shoe(kind="iid", hands=80, seed=0):
+    return SHOE_KINDS[kind](random.Random(f"{kind}:{seed}"), hands)
+
+def generate_shoes(kind="iid", count=100, hands=80, seed=0):
+    return [generate_shoe(kind, hands, seed * 1_000_003 + i) for i in range(count)]
@@ -0,0 +1,307 @@
+from functools import lru_cache
+
+import numpy as np
+
+from oracle_engine import (
+    DEFAULT_CONFIG, OUTCOMES, OUTCOME_CODES,
+    analyze_momentum, analyze_intuition, combine_analyses
+)
+
+# --- Vectorized Backtesting ---
+# Replays whole shoes through the same logic as oracle_engine.predict_outcome(),
+# computing every hand of every shoe at once with sliding windows over a
+# (shoes x hands) integer array. Hand t of a shoe is predicted from hands [0, t).
+
+P, B, T = OUTCOME_CODES['P'], OUTCOME_CODES['B'], OUTCOME_CODES['T']
+PAD = -1 # Marks the unused tail of shorter shoes
+
+# Prediction codes that are not an outcome
+NOT_ENOUGH = -2 # "ไม่เพียงพอ"
+NO_PATTERN = -3 # "ไม่พบรูปแบบ"
+UNCLEAR = -4 # "ไม่ชัดเจน"
+STATUS_TEXT = {NOT_ENOUGH: "ไม่เพียงพอ", NO_PATTERN: "ไม่พบรูปแบบ", UNCLEAR: "ไม่ชัดเจน"}
+
+# Bits of the predicted_by mask, in the order predict_outcome() lists the sources (NGram and
+# DNAContext only come from an NGramModel / DNAIndex, which the backtest does not run; the ledger records them)
+SOURCE_BITS = (("DNA", 1), ("Momentum", 2), ("Intuition", 4), ("NGram", 8), ("DNAContext", 16))
+
+
+def encode_shoes(shoes):
+    # List of outcome strings (or lists of 'P'/'B'/'T') -> PAD-filled int8 array
+    width = max((len(shoe) for shoe in shoes), default=0)
+    encoded = np.full((len(shoes), width), PAD, dtype=np.int8)
+    for row, shoe in enumerate(shoes):
+        encoded[row, :len(shoe)] = [OUTCOME_CODES[o] for o in shoe]
+    return encoded
+
+
+def _lag(values, d, lo):
+    # values[t - d] for the hands t >= lo (a contiguous view, no copy)
+    return values[lo - d : len(values) - d]
+
+
+def _word_type(config):
+    # One bit per hand of the window, plus the unused bit 0
+    return np.uint32 if config.max_history_for_analysis < 32 else np.uint64
+
+
+def _last_4_string(code):
+    return "".join(OUTCOMES[(code // len(OUTCOMES) ** power) % len(OUTCOMES)] for power in (3, 2, 1, 0))
+
+
+@lru_cache(maxsize=None)
+def _combine_table(config, gated):
+    # Momentum only looks at the last 4 hands and the simple intuition at the last 3, and the
+    # DNA result is an outcome plus a count/total fraction. So predict_outcome()'s combination
+    # step is tabulated once by calling combine_analyses() on every reachable combination.
+    # The counter-bias branch needs the whole window: it is disabled here (a 3-hand string can
+    # still reach it when counter_bias_streak_threshold < 3) and applied by _counter_signal().
+    # `gated` adds the variants where the window is too short for Momentum (< 5) or Intuition (< 3).
+    simple = config._replace(counter_bias_streak_threshold=config.max_history_for_analysis + 1)
+    span = config.max_history_for_analysis - config.dna_pattern_length
+    fractions = sorted({count / total for total in range(1, span + 1) for count in range(1, total + 1)})
+    fraction_ids = np.zeros((span + 1) * (span + 1), dtype=np.intp) # Indexed by count * (span + 1) + total
+    for total in range(1, span + 1):
+        for count in range(1, total + 1):
+            fraction_ids[count * (span + 1) + total] = fractions.index(count / total)
+    dna_results = [(None, 0)] + [(outcome, value) for outcome in OUTCOMES for value in fractions]
+    status_codes = {text: code for code, text in STATUS_TEXT.items()}
+
+    size = len(OUTCOMES) ** 4
+    shape = ((3 if gated else 1) * size, len(dna_results))
+    prediction = np.zeros(shape, dtype=np.int8)
+    confidence = np.zeros(shape)
+    predicted_by = np.zeros(shape, dtype=np.uint8)
+    for row in range(shape[0]):
+        variant, last_4 = divmod(row, size)
+        last_4 = _last_4_string(last_4)
+        momentum = analyze_momentum(last_4[0] + last_4, config) if variant == 0 else (None, 0)
+        intuition = analyze_intuition(last_4[1:], simple) if variant < 2 else (None, 0, False)
+        for state, dna in enumerate(dna_results):
+            result = combine_analyses(dna, momentum, intuition, config)
+            prediction[row, state] = OUTCOME_CODES.get(result["prediction"], status_codes.get(result["prediction"]))
+            confidence[row, state] = result["confidence"]
+            predicted_by[row, state] = sum(bit for source, bit in SOURCE_BITS if source in result["predicted_by"])
+    return fraction_ids, len(fractions), prediction.ravel(), confidence.ravel(), predicted_by.ravel()
+
+
+def _window_bits(s, window, word):
+    # seen[c][t] has bit d set when hand t - d (1 <= d <= window) was outcome c,
+    # built by doubling the covered span instead of looping over every offset
+    hands = np.minimum(np.arange(len(s)), window)[:, None].astype(word)
+    available = (word(1) << (hands + word(1))) - word(2) # Bits 1..n for the hands that exist
+    seen = []
+    for code in (P, B):
+        bits = np.zeros(s.shape, dtype=word)
+        bits[1:] = (s[:-1] == code).astype(word) << word(1)
+        span = 1
+        while span < window and span < len(s):
+            bits[span:] |= bits[:-span] << word(span)
+            span *= 2
+        seen.append(bits & available)
+    seen.append(available & ~(seen[P] | seen[B]))
+    return seen
+
+
+def _select(flags, values):
+    # values[i] where flags[i], computed with arithmetic instead of np.where/np.choose,
+    # which are several times slower on unpredictable masks
+    result = flags[0] * values[0]
+    for flag, value in zip(flags[1:], values[1:]):
+        result += flag * value
+    return result
+
+
+def _dna_signal(seen, same, start, config, word):
+    # Followers of the last dna_pattern_length hands inside each window.
+    # matches has bit d set when the pattern before hand t - d equals the current one.
+    k = config.dna_pattern_length
+    lo = max(start, k - 1)
+    matches = np.zeros(same[start:].shape, dtype=word)
+    if lo < len(same):
+        matches[lo - start:] = same[lo:]
+        for offset in range(1, k):
+            matches[lo - start:] &= _lag(same, offset, lo)
+        matches &= word(((1 << (config.max_history_for_analysis - k + 1)) - 1) ^ 1)
+
+    # Highest follower count wins; Counter.most_common() keeps the first-seen follower on ties,
+    # which is the one holding the highest offset bit. The follower bit sets are disjoint,
+    # so (count, bits) packed into one integer orders them exactly.
+    count_shift = np.uint64(57) # Above the window bits (max_history_for_analysis <= 56)
+    keys = []
+    for bits in seen:
+        followers = matches & bits[start:]
+        keys.append((np.bitwise_count(followers).astype(np.uint64) << count_shift) | followers)
+    best_key = np.maximum(np.maximum(keys[P], keys[B]), keys[T])
+    best = _select([keys[code] == best_key for code in (B, T)], [B, T]).astype(np.intp)
+    best_count = (best_key >> count_shift).astype(np.intp)
+    total = np.bitwise_count(matches).astype(np.intp)
+    return total > 0, best, best_count, total
+
+
+def _counter_signal(streak, same, config, word):
+    # Counter bias: an earlier copy of the current streak ends at offset d when bits
+    # d .. d + streak - 1 of `same` are all set (the current streak itself sits at d = 0).
+    # Only hands whose streak reaches counter_bias_streak_threshold are examined.
+    counter = np.zeros(streak.shape, dtype=bool)
+    candidates = np.flatnonzero(streak >= config.counter_bias_streak_threshold)
+    if not len(candidates):
+        return counter
+    same = same.ravel()[candidates]
+    wanted = streak.ravel()[candidates].astype(word)
+    runs = {1: same} # runs[w] has bit d set when bits d .. d + w - 1 are all set
+    width = 1
+    while width * 2 <= config.max_history_for_analysis:
+        runs[width * 2] = runs[width] & (runs[width] >> word(width))
+        width *= 2
+    instances = np.full(len(candidates), np.iinfo(word).max, dtype=word)
+    covered = np.zeros(len(candidates), dtype=word)
+    for width in sorted(runs, reverse=True):
+        use = wanted & word(width) # Either width or 0
+        skip = (use == 0) * word(np.iinfo(word).max)
+        instances &= (runs[width] >> covered) | skip
+        covered += use
+    instances &= ~word(1)
+    total = np.bitwise_count(instances)
+    breaks = np.bitwise_count(instances & ~(same << word(1))) # Hand after the copy was not the same outcome
+    counter.ravel()[candidates] = (total > 0) & (2 * breaks.astype(np.int16) > total)
+    return counter
+
+
+def _backtest_block(s, start, config, word):
+    # Predictions for hands [start, n_hands) of a (hands x shoes) block
+    rows = slice(start, None)
+    window = config.max_history_for_analysis
+    n = np.minimum(np.arange(start, len(s)), window)[:, None]
+    seen = _window_bits(s, window, word)
+    previous = np.zeros_like(s)
+    previous[1:] = s[:-1]
+    # Bit d: hand t - 1 - d equals hand t - 1
+    same = _select([previous == code for code in range(len(OUTCOMES))], seen) >> word(1)
+    same_rows = same[rows]
+    streak = np.bitwise_count(same_rows & ~(same_rows + word(1))) # Trailing ones = current streak in the window
+    last = _lag(s, 1, start)
+
+    last_4 = np.zeros(last.shape, dtype=np.intp) # Base-3 code of the last 4 hands
+    for d in range(4, 0, -1):
+        last_4 *= len(OUTCOMES)
+        if start >= d:
+            last_4 += _lag(s, d, start)
+        else:
+            last_4[d - start:] += _lag(s, d, d)
+    if start < 5: # Windows too short for Momentum / Intuition use the gated table rows
+        last_4 += ((n < 5).astype(np.intp) + (n < 3)) * len(OUTCOMES) ** 4
+
+    fraction_ids, fraction_count, table_prediction, table_confidence, table_predicted_by = _combine_table(config, start < 5)
+    dna_found, dna_best, dna_count, dna_total = _dna_signal(seen, same, start, config, word)
+    span = window - config.dna_pattern_length
+    dna_state = dna_found * (1 + dna_best * fraction_count + np.take(fraction_ids, dna_count * (span + 1) + dna_total))
+    index = last_4 * (1 + len(OUTCOMES) * fraction_count) + dna_state
+    prediction = np.take(table_prediction, index)
+    confidence = np.take(table_confidence, index)
+    predicted_by = np.take(table_predicted_by, index)
+
+    # A counter result always carries counter_prediction_threshold, so predict_outcome() returns it
+    # outright. np.where keeps the values bit-exact (arithmetic blending would round the confidence).
+    counter = _counter_signal(streak, same_rows, config, word)
+    opposite = np.where(last == B, np.int8(P), np.int8(B)) # ('P' if last == 'B' else 'B')
+    prediction = np.where(counter, opposite, prediction)
+    confidence = np.where(counter, config.counter_prediction_threshold, confidence)
+    predicted_by = np.where(counter, np.uint8(SOURCE_BITS[2][1]), predicted_by)
+    return prediction, confidence, predicted_by, counter
+
+
+def _prepare(shoes, config):
+    # -> (shoes, word type, first hand predicted by _backtest_block). Hand 0 is never one of
+    # them: with min_history_for_prediction <= 0 it is NO_PATTERN (see backtest())
+    if config.max_history_for_analysis > 56:
+        raise ValueError("backtest() supports max_history_for_analysis up to 56 hands")
+    shoes = np.atleast_2d(np.asarray(shoes))
+    # Hands before `start` never have min_history_for_prediction hands in their window
+    minimum = config.min_history_for_prediction
+    length = shoes.shape[1]
+    start = minimum if minimum <= config.max_history_for_analysis else length
+    return shoes, _word_type(config), min(max(start, 1), length)
+
+
+def _hands_first(shoes):
+    # (shoes x hands) codes -> contiguous (hands x shoes) int8 with the PAD cells set to 0
+    return np.ascontiguousarray(np.where(shoes >= 0, shoes, 0).T, dtype=np.int8)
+
+
+def _totals(total_hands, total_predictions, correct_predictions, total_counter_predictions, correct_counter_predictions):
+    return {
+        "total_hands": total_hands,
+        "total_predictions": total_predictions,
+        "correct_predictions": correct_predictions,
+        "accuracy": correct_predictions / total_predictions if total_predictions else 0.0,
+        "total_counter_predictions": total_counter_predictions,
+        "correct_counter_predictions": correct_counter_predictions,
+    }
+
+
+def backtest(shoes, block_size=1024, config=DEFAULT_CONFIG):
+    # shoes: (n_shoes, n_hands) array of OUTCOME_CODES, PAD after the end of shorter shoes.
+    # Internally hands run along axis 0 so every sliding window is a contiguous slice,
+    # each window is held as bitmasks in one machine word per hand, and shoes are
+    # processed in blocks that stay in cache.
+    shoes, word, start = _prepare(shoes, config)
+    valid = shoes >= 0
+    s = _hands_first(shoes)
+
+    prediction = np.full(s.shape, NOT_ENOUGH, dtype=np.int8)
+    confidence = np.zeros(s.shape)
+    predicted_by = np.zeros(s.shape, dtype=np.uint8)
+    is_counter = np.zeros(s.shape, dtype=bool)
+    for first in range(0, s.shape[1], block_size):
+        block = slice(first, first + block_size)
+        (prediction[start:, block], confidence[start:, block],
+         predicted_by[start:, block], is_counter[start:, block]) = _backtest_block(
+            np.ascontiguousarray(s[:, block]), start, config, word)
+    if config.min_history_for_prediction <= 0 and len(s):
+        prediction[0] = NO_PATTERN # predict_outcome(""): no analyzer fires on an empty window
+
+    # Back to (shoes x hands)
+    prediction = np.where(valid, prediction.T, PAD)
+    confidence = confidence.T * valid
+    predicted_by = predicted_by.T * valid
+    is_counter = is_counter.T & valid
+    made = prediction >= 0
+    correct = made & (prediction == shoes)
+    counter_made = made & is_counter
+    return {
+        "prediction": prediction,
+        "confidence": confidence,
+        "predicted_by": predicted_by,
+        "is_counter": is_counter,
+        "correct": correct,
+        **_totals(int(valid.sum()), int(made.sum()), int(correct.sum()),
+                  int(counter_made.sum()), int((correct & counter_made).sum())),
+    }
+
+
+def backtest_totals(shoes, block_size=1024, config=DEFAULT_CONFIG):
+    # Only the totals of backtest() (what a parameter sweep needs): each block is transposed,
+    # predicted and counted on its own, so memory stays at one block whatever the corpus size.
+    shoes, word, start = _prepare(shoes, config)
+    totals = np.zeros(5, dtype=np.int64)
+    for first in range(0, shoes.shape[0], block_size):
+        block = shoes[first:first + block_size]
+        s = _hands_first(block)
+        prediction, _, _, is_counter = _backtest_block(s, start, config, word)
+        made = (prediction >= 0) & (block.T[start:] >= 0)
+        correct = made & (prediction == s[start:])
+        counter_made = made & is_counter
+        totals += (np.count_nonzero(block >= 0), np.count_nonzero(made), np.count_nonzero(correct),
+                   np.count_nonzero(counter_made), np.count_nonzero(correct & counter_made))
+    return _totals(*(int(total) for total in totals))
+
+
+def prediction_at(result, shoe, hand):
+    # Rebuilds the predict_outcome() dict for one hand of a backtest result
+    code = int(result["prediction"][shoe, hand])
+    mask = int(result["predicted_by"][shoe, hand])
+    return {"prediction": OUTCOMES[code] if code >= 0 else STATUS_TEXT[code],
+            "confidence": float(result["confidence"][shoe, hand]),
+            "predicted_by": [source for source, bit in SOURCE_BITS if mask & bit],
+            "is_counter": bool(result["is_counter"][shoe, hand])}
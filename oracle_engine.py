@@ -1,5 +1,11 @@
+import math
 import random
-from collections import Counter
+import struct
+import time
+from array import array
+import threading
+from collections import Counter, OrderedDict, deque, namedtuple
+from operator import methodcaller
 
 # --- Configuration for Prediction Logic (from V1.13) ---
 MIN_HISTORY_FOR_PREDICTION = 15
@@ -9,6 +15,32 @@ COUNTER_PREDICTION_THRESHOLD = 0.65
 DNA_PATTERN_LENGTH = 5
 MOMENTUM_THRESHOLD = 0.70 # Not explicitly used as threshold in V1.13 momentum, but good to keep
 COUNTER_BIAS_STREAK_THRESHOLD = 3
+DNA_CONTEXT_MIN_LENGTH = 3 # Shortest pattern the long-context DNAIndex falls back to
+DNA_CONTEXT_MAX_LENGTH = 10 # Longest pattern the long-context DNAIndex tracks
+DNA_CONTEXT_MIN_MATCHES = 4 # Earlier matches a context needs before the DNAContext analyzer uses it
+PREDICTION_CACHE_SIZE = 4096 # Analysis windows remembered by a PredictionCache
+NGRAM_ORDER = 6 # Longest context the decayed NGramModel counts followers for
+NGRAM_DECAY = 0.998 # Weight kept by each counted hand per newer hand (half-life ~350 hands)
+NGRAM_MIN_EVIDENCE = 4.0 # Decayed follower weight a context needs before the model uses it
+NGRAM_MIN_CONFIDENCE = 0.5 # Weaker leans are not reported as a signal
+
+# --- Engine Configuration ---
+# The constants above are the defaults. Passing an EngineConfig lets several
+# configurations run in the same process (backtests, parameter sweeps).
+EngineConfig = namedtuple("EngineConfig", [
+    "min_history_for_prediction", "max_history_for_analysis",
+    "prediction_threshold", "counter_prediction_threshold",
+    "dna_pattern_length", "counter_bias_streak_threshold",
+], defaults=(
+    MIN_HISTORY_FOR_PREDICTION, MAX_HISTORY_FOR_ANALYSIS,
+    PREDICTION_THRESHOLD, COUNTER_PREDICTION_THRESHOLD,
+    DNA_PATTERN_LENGTH, COUNTER_BIAS_STREAK_THRESHOLD,
+))
+DEFAULT_CONFIG = EngineConfig()
+
+# --- Outcome Encoding (small integers used by the batch/backtest paths) ---
+OUTCOMES = "PBT"
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)} # {'P': 0, 'B': 1, 'T': 2}
 
 # --- Helper Functions (from V1.13) ---
 
@@ -17,24 +49,487 @@ def get_outcome_emoji(outcome):
     return "🟦" if outcome == 'P' else "🟥" if outcome == 'B' else "⚪️"
 
 def get_latest_history_string(history_list, num_results=MAX_HISTORY_FOR_ANALYSIS):
-    # Extracts the string of outcomes for analysis
+    # Extracts the string of outcomes for analysis (a History serves its cached window)
+    if isinstance(history_list, History):
+        return history_list.window_string(num_results)
+    if isinstance(history_list, str):
+        return history_list[-num_results:]
     return "".join([h['main_outcome'] for h in history_list[-num_results:]])
 
+# --- Compact History Store ---
+# Outcomes are packed 2 bits per hand (4 hands per byte) in a ring buffer, with the
+# timestamps in a parallel array of floats (NaN = unknown, only allocated once a
+# timestamp is actually recorded). A bounded History drops
+# its oldest hand on append, so truncating never copies; an unbounded one doubles
+# its buffers, which keeps 100k+ hand shoes at ~25 KB of outcomes.
+
+_PACKED_STRINGS = ["".join((OUTCOMES + "?")[(byte >> shift) & 3] for shift in (0, 2, 4, 6)) for byte in range(256)]
+_CODE_BYTES = bytes.maketrans(OUTCOMES.encode("ascii"), bytes(range(len(OUTCOMES))))
+
+class History:
+    def __init__(self, outcomes=(), max_length=None):
+        self.max_length = max_length # None = unbounded
+        self._capacity = 0
+        self._packed = bytearray()
+        self._timestamps = None
+        self._head = 0 # Buffer slot of the oldest hand
+        self._length = 0
+        self._version = 0 # Bumped on every change; invalidates views and the window cache
+        self._window_cache = {}
+        self._reserve(max_length if max_length is not None else 64)
+        for outcome in outcomes:
+            self.append(outcome)
+
+    def _reserve(self, capacity):
+        # Re-linearizes the ring into buffers of at least `capacity` slots (a multiple of 4)
+        capacity = max(4, -(-capacity // 4) * 4)
+        text = self._decode(0, self._length)
+        timestamps = None if self._timestamps is None else [self._timestamps[self._slot(i)] for i in range(self._length)]
+        self._capacity = capacity
+        self._packed = bytearray(capacity // 4)
+        self._head = 0
+        for i, outcome in enumerate(text):
+            self._store(i, OUTCOME_CODES[outcome])
+        if timestamps is not None:
+            self._timestamps = array('d', timestamps) + array('d', [math.nan]) * (capacity - len(timestamps))
+
+    def _slot(self, index):
+        return (self._head + index) % self._capacity
+
+    def _store(self, slot, code):
+        shift = (slot & 3) << 1
+        self._packed[slot >> 2] = (self._packed[slot >> 2] & ~(3 << shift) & 0xFF) | (code << shift)
+
+    def _code(self, index):
+        slot = self._slot(index)
+        return (self._packed[slot >> 2] >> ((slot & 3) << 1)) & 3
+
+    def _decode(self, start, stop):
+        # Outcome string of hands [start, stop), decoded a byte (4 hands) at a time
+        parts = []
+        while start < stop:
+            slot = self._slot(start)
+            count = min(stop - start, self._capacity - slot) # Up to the end of the buffer
+            first, last = slot >> 2, (slot + count - 1) >> 2
+            chunk = "".join([_PACKED_STRINGS[byte] for byte in self._packed[first:last + 1]])
+            offset = slot & 3
+            parts.append(chunk[offset:offset + count])
+            start += count
+        return "".join(parts)
+
+    def _changed(self):
+        self._version += 1
+        self._window_cache.clear()
+
+    # -- Container interface --
+
+    def __len__(self):
+        return self._length
+
+    def _index(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("History index out of range")
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                raise ValueError("History slices do not support a step")
+            return HistoryView(self, start, max(start, stop))
+        return OUTCOMES[self._code(self._index(index))]
+
+    def __iter__(self):
+        return iter(self.window(self._length))
+
+    def __repr__(self):
+        return f"History({self._decode(0, self._length)!r}, max_length={self.max_length})"
+
+    def timestamp(self, index):
+        index = self._index(index)
+        return math.nan if self._timestamps is None else self._timestamps[self._slot(index)]
+
+    def append(self, outcome, timestamp=None):
+        if self.max_length is not None and self._length >= self.max_length:
+            if self.max_length == 0:
+                return
+            self._head = self._slot(1) # Drop the oldest hand
+            self._length -= 1
+        elif self._length == self._capacity:
+            self._reserve(self._capacity * 2)
+        slot = self._slot(self._length)
+        self._store(slot, OUTCOME_CODES[outcome])
+        if timestamp is not None and self._timestamps is None:
+            self._timestamps = array('d', [math.nan]) * self._capacity
+        if self._timestamps is not None:
+            self._timestamps[slot] = math.nan if timestamp is None else timestamp
+        self._length += 1
+        self._changed()
+
+    def appendleft(self, outcome, timestamp=None):
+        # Puts back a hand older than all the others (a full bounded History does not take it)
+        if self.max_length is not None and self._length >= self.max_length:
+            raise IndexError("appendleft to a full History")
+        if self._length == self._capacity:
+            self._reserve(self._capacity * 2)
+        self._head = self._slot(-1)
+        self._store(self._head, OUTCOME_CODES[outcome])
+        if timestamp is not None and self._timestamps is None:
+            self._timestamps = array('d', [math.nan]) * self._capacity
+        if self._timestamps is not None:
+            self._timestamps[self._head] = math.nan if timestamp is None else timestamp
+        self._length += 1
+        self._changed()
+
+    def pop(self):
+        if not self._length:
+            raise IndexError("pop from empty History")
+        outcome = self[-1]
+        self._length -= 1
+        self._changed()
+        return outcome
+
+    def clear(self):
+        self._head = 0
+        self._length = 0
+        self._changed()
+
+    # -- Analysis window --
+
+    def window(self, count=MAX_HISTORY_FOR_ANALYSIS):
+        # Zero-copy view of the last `count` hands
+        return HistoryView(self, max(0, self._length - count), self._length)
+
+    def window_string(self, count=MAX_HISTORY_FOR_ANALYSIS):
+        # Same string get_latest_history_string() builds from a list of dicts, cached until the next change
+        text = self._window_cache.get(count)
+        if text is None:
+            text = self._window_cache[count] = self._decode(max(0, self._length - count), self._length)
+        return text
+
+    def window_bytes(self, count=MAX_HISTORY_FOR_ANALYSIS):
+        # The analysis window as OUTCOME_CODES bytes (e.g. for numpy.frombuffer), cached like window_string()
+        key = ("bytes", count)
+        codes = self._window_cache.get(key)
+        if codes is None:
+            codes = self._window_cache[key] = self.window_string(count).encode("ascii").translate(_CODE_BYTES)
+        return codes
+
+    # -- Pickling (Streamlit session state) --
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_window_cache"] = {}
+        return state
+
+class HistoryView:
+    # Read-only window over hands [start, stop) of a History, valid until the History changes
+    def __init__(self, history, start, stop):
+        self._history = history
+        self._start = start
+        self._stop = stop
+        self._version = history._version
+
+    def _check(self):
+        if self._version != self._history._version:
+            raise RuntimeError("History changed after the view was taken")
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        self._check()
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("History slices do not support a step")
+            return HistoryView(self._history, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("HistoryView index out of range")
+        return self._history[self._start + index]
+
+    def __iter__(self):
+        self._check()
+        return iter(self._history._decode(self._start, self._stop))
+
+    def __str__(self):
+        self._check()
+        return self._history._decode(self._start, self._stop)
+
+    def __repr__(self):
+        return f"HistoryView({str(self)!r})"
+
+    def timestamps(self):
+        self._check()
+        return [self._history.timestamp(i) for i in range(self._start, self._stop)]
+
+# --- Road Model ---
+# BigRoad is the run-length form of a history: one [outcome, length] run per streak
+# (a Tie streak is a run of its own, as in the analyzers), with a histogram of the
+# lengths of the finished runs per outcome. Hands can be added or removed at either
+# end, so it serves both whole strings and OracleStream's sliding window.
+
+class BigRoad:
+    def __init__(self, outcomes=()):
+        self._runs = deque() # The last run is still open
+        self._closed_runs = None # {outcome: {length: runs}}, built on first use
+        self._length = 0
+        last = None
+        for outcome in outcomes:
+            if outcome == last:
+                self._runs[-1][1] += 1
+            else:
+                self._runs.append([outcome, 1])
+                last = outcome
+            self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    def _close_run(self, run, delta):
+        if self._closed_runs is None: # Nothing to update until the histogram is built
+            return
+        lengths = self._closed_runs.get(run[0])
+        if lengths is None:
+            lengths = self._closed_runs[run[0]] = {}
+        count = lengths.get(run[1], 0) + delta
+        if count:
+            lengths[run[1]] = count
+        else:
+            del lengths[run[1]]
+
+    def push(self, outcome):
+        if self._runs and self._runs[-1][0] == outcome:
+            self._runs[-1][1] += 1
+        else:
+            if self._runs:
+                self._close_run(self._runs[-1], 1)
+            self._runs.append([outcome, 1])
+        self._length += 1
+
+    def pop(self):
+        run = self._runs[-1]
+        run[1] -= 1
+        if run[1] == 0:
+            self._runs.pop()
+            if self._runs:
+                self._close_run(self._runs[-1], -1) # Previous run is open again
+        self._length -= 1
+        return run[0]
+
+    def pop_front(self):
+        run = self._runs[0]
+        closed = len(self._runs) > 1
+        if closed:
+            self._close_run(run, -1)
+        run[1] -= 1
+        if run[1] == 0:
+            self._runs.popleft()
+        elif closed:
+            self._close_run(run, 1)
+        self._length -= 1
+        return run[0]
+
+    def push_front(self, outcome):
+        if self._runs and self._runs[0][0] == outcome:
+            run = self._runs[0]
+            closed = len(self._runs) > 1
+            if closed:
+                self._close_run(run, -1)
+            run[1] += 1
+            if closed:
+                self._close_run(run, 1)
+        else:
+            self._runs.appendleft([outcome, 1])
+            if len(self._runs) > 1:
+                self._close_run(self._runs[0], 1)
+        self._length += 1
+
+    def streak(self):
+        # (outcome, length) of the current streak
+        if not self._runs:
+            return None, 0
+        return tuple(self._runs[-1])
+
+    def last(self, count):
+        # The last `count` outcomes as a string, read from the runs
+        parts = []
+        for outcome, length in reversed(self._runs):
+            if count <= 0:
+                break
+            parts.append(outcome * min(length, count))
+            count -= length
+        return "".join(reversed(parts))
+
+    def ping_pong(self, count=4):
+        # True when the last `count` hands alternate between P and B (e.g. "PBPB")
+        # (neighbouring runs always differ, so it is enough that none is a Tie run)
+        if len(self._runs) < count:
+            return False
+        for i in range(1, count + 1):
+            outcome, length = self._runs[-i]
+            if outcome == 'T' or (i < count and length != 1):
+                return False
+        return True
+
+    def streak_break_stats(self, outcome, streak_count):
+        # How often an earlier streak of `streak_count` x `outcome` continued or broke:
+        # every finished run of length L >= streak_count broke once and held L - streak_count + 1 copies
+        if self._closed_runs is None:
+            self._closed_runs = {}
+            for run in list(self._runs)[:-1]:
+                self._close_run(run, 1)
+        break_count = 0
+        total_instances_checked = 0
+        for length, runs in self._closed_runs.get(outcome, {}).items():
+            if length >= streak_count:
+                break_count += runs
+                total_instances_checked += runs * (length - streak_count + 1)
+        return break_count, total_instances_checked
+
+# The derived roads read the standard big road, where Ties do not take a cell and a
+# column is a P or B streak. Each new P/B hand adds a red ("repeats") or blue ("chaotic")
+# entry to a derived road by comparing columns `offset` apart. Only hands are added or
+# removed at the back (undo), so every update and the ask-road lookups are O(1).
+DERIVED_ROADS = (("Big Eye Boy", 1), ("Small Road", 2), ("Cockroach Pig", 3))
+
+_ROADS_HEADER = struct.Struct("<8sQQ") # magic, hands, columns
+_ROADS_MAGIC = b"ORROADS2"
+_TIE_CODE = OUTCOME_CODES['T']
+
+class DerivedRoads:
+    # Stored one byte per hand / entry (a table's stream carries one over its whole history)
+    def __init__(self, outcomes=()):
+        self._hands = bytearray() # OUTCOME_CODES of every outcome pushed, to undo in pop()
+        self._columns = array("I") # Lengths of the big road columns
+        self._column_outcome = None # Outcome of the current (last) column
+        self.entries = {name: bytearray() for name, _ in DERIVED_ROADS} # 1 = red, 0 = blue
+        self._red = {name: 0 for name, _ in DERIVED_ROADS}
+        for outcome in outcomes:
+            self.push(outcome)
+
+    def __len__(self):
+        return len(self._hands)
+
+    def _entry(self, column, row, offset):
+        # Colour of the derived entry for a big road cell, None before the road starts
+        if row == 0:
+            if column < offset + 1:
+                return None
+            return self._columns[column - 1] == self._columns[column - 1 - offset]
+        if column < offset:
+            return None
+        return self._columns[column - offset] != row
+
+    def push(self, outcome):
+        self._hands.append(OUTCOME_CODES[outcome])
+        if outcome == 'T':
+            return
+        if outcome == self._column_outcome:
+            self._columns[-1] += 1
+        else:
+            self._columns.append(1)
+            self._column_outcome = outcome
+        column, row = len(self._columns) - 1, self._columns[-1] - 1
+        for name, offset in DERIVED_ROADS:
+            red = self._entry(column, row, offset)
+            if red is not None:
+                self.entries[name].append(red)
+                self._red[name] += red
+
+    def pop(self):
+        outcome = OUTCOMES[self._hands.pop()]
+        if outcome == 'T':
+            return outcome
+        column, row = len(self._columns) - 1, self._columns[-1] - 1
+        for name, offset in DERIVED_ROADS:
+            if self._entry(column, row, offset) is not None:
+                self._red[name] -= self.entries[name].pop()
+        self._columns[-1] -= 1
+        if not self._columns[-1]:
+            self._columns.pop()
+            self._column_outcome = ('P' if outcome == 'B' else 'B') if self._columns else None
+        return outcome
+
+    def ask(self, name, outcome):
+        # Entry the road would get if the next hand were `outcome` ('P' or 'B')
+        offset = dict(DERIVED_ROADS)[name]
+        if outcome == self._column_outcome:
+            return self._entry(len(self._columns) - 1, self._columns[-1], offset)
+        return self._entry(len(self._columns), 0, offset)
+
+    def analyze(self, name):
+        # Signal: the outcome whose next entry matches the road's dominant colour,
+        # with that colour's share of the road as confidence
+        entries = len(self.entries[name])
+        if not entries or 2 * self._red[name] == entries:
+            return None, 0
+        red = 2 * self._red[name] > entries
+        share = (self._red[name] if red else entries - self._red[name]) / entries
+        matches = [outcome for outcome in "PB" if self.ask(name, outcome) == red]
+        if len(matches) != 1:
+            return None, 0
+        return matches[0], share
+
+    def analyze_all(self):
+        return {name: self.analyze(name) for name, _ in DERIVED_ROADS}
+
+    # -- Checkpoints --
+
+    def checkpoint(self):
+        # The whole state as bytes: a header, the hands, the column lengths and each road's entries
+        parts = [_ROADS_HEADER.pack(_ROADS_MAGIC, len(self._hands), len(self._columns)),
+                 bytes(self._hands), self._columns.tobytes()]
+        for name, _ in DERIVED_ROADS:
+            parts.append(struct.pack("<Q", len(self.entries[name])))
+            parts.append(bytes(self.entries[name]))
+        return b"".join(parts)
+
+    @classmethod
+    def restore(cls, data):
+        magic, hands, column_count = _ROADS_HEADER.unpack_from(data)
+        if magic != _ROADS_MAGIC:
+            raise ValueError("Not a DerivedRoads checkpoint")
+        data = memoryview(data)
+        offset = _ROADS_HEADER.size
+        roads = cls()
+        roads._hands = bytearray(data[offset:offset + hands])
+        offset += hands
+        width = roads._columns.itemsize
+        roads._columns.frombytes(data[offset:offset + width * column_count])
+        offset += width * column_count
+        for name, _ in DERIVED_ROADS:
+            (count,) = struct.unpack_from("<Q", data, offset)
+            offset += 8
+            roads.entries[name] = entries = bytearray(data[offset:offset + count])
+            roads._red[name] = count - entries.count(0)
+            offset += count
+        if offset != len(data) or len(roads._hands) != hands or len(roads._columns) != column_count:
+            raise ValueError("Truncated DerivedRoads checkpoint")
+        big_road = roads._hands.rstrip(bytes([_TIE_CODE]))
+        roads._column_outcome = OUTCOMES[big_road[-1]] if big_road else None
+        return roads
+
 # --- Prediction Logic (from V1.13) ---
 
-def analyze_dna_pattern(history_str):
-    if len(history_str) < DNA_PATTERN_LENGTH:
+def analyze_dna_pattern(history_str, config=DEFAULT_CONFIG):
+    pattern_length = config.dna_pattern_length
+    if len(history_str) < pattern_length:
         return None, 0
 
-    target_pattern = history_str[-DNA_PATTERN_LENGTH:]
+    target_pattern = history_str[-pattern_length:]
     
     followers = Counter()
     total_matches = 0 # In V1.13, it was a simple count, not weighted
     
-    for i in range(len(history_str) - DNA_PATTERN_LENGTH):
-        if history_str[i : i + DNA_PATTERN_LENGTH] == target_pattern:
-            if (i + DNA_PATTERN_LENGTH) < len(history_str):
-                follower_outcome = history_str[i + DNA_PATTERN_LENGTH]
+    for i in range(len(history_str) - pattern_length):
+        if history_str[i : i + pattern_length] == target_pattern:
+            if (i + pattern_length) < len(history_str):
+                follower_outcome = history_str[i + pattern_length]
                 followers[follower_outcome] += 1
                 total_matches += 1
     
@@ -49,59 +544,53 @@ def analyze_dna_pattern(history_str):
         return predicted_outcome, confidence
     return None, 0
 
-def analyze_momentum(history_str):
-    if len(history_str) < 5: # V1.13 had a minimum length for momentum
+def _streak_length(history_str):
+    # Length of the run of history_str[-1] at the end of the string
+    return len(history_str) - len(history_str.rstrip(history_str[-1])) if history_str else 0
+
+def analyze_momentum(history_str, config=DEFAULT_CONFIG):
+    # Momentum has no tunable parameters; config keeps the analyzer signatures uniform.
+    # It only reads the current streak (>= 3 or not) and the last 4 hands, so the road of the
+    # last 5 hands gives the same result as one of the whole string.
+    if len(history_str) < 5:
         return None, 0
+    return momentum_from_road(BigRoad(history_str[-5:]), config)
 
-    last_outcome = history_str[-1]
-    last_streak_length = 0
-    for i in reversed(range(len(history_str))):
-        if history_str[i] == last_outcome:
-            last_streak_length += 1
-        else:
-            break
-            
+def momentum_from_road(road, config=DEFAULT_CONFIG):
+    if len(road) < 5: # V1.13 had a minimum length for momentum
+        return None, 0
+
+    last_outcome, last_streak_length = road.streak()
     if last_streak_length >= 3: # Predict to continue streak if >= 3
         return last_outcome, 0.70 # Fixed confidence for momentum in V1.13
     
-    if len(history_str) >= 4 and history_str[-4:] in ["PBPB", "BPBP"]: # Ping-pong pattern
-        predicted_outcome = 'P' if history_str[-1] == 'B' else 'B'
+    if road.ping_pong(4): # Ping-pong pattern (PBPB / BPBP)
+        predicted_outcome = 'P' if last_outcome == 'B' else 'B'
         return predicted_outcome, 0.65 # Fixed confidence for ping-pong
     
     return None, 0
 
-def analyze_intuition(history_str):
-    if len(history_str) < 3:
+def analyze_intuition(history_str, config=DEFAULT_CONFIG):
+    # Only the counter-bias branch reads the whole history; below its streak threshold
+    # the last 3 hands are enough
+    if _streak_length(history_str) < config.counter_bias_streak_threshold:
+        history_str = history_str[-3:]
+    return intuition_from_road(BigRoad(history_str), config)
+
+def intuition_from_road(road, config=DEFAULT_CONFIG):
+    if len(road) < 3:
         return None, 0, False
 
-    last_3 = history_str[-3:]
-    last_2 = history_str[-2:]
-    
-    # Counter Bias Logic (as present in V1.13)
-    if len(history_str) >= COUNTER_BIAS_STREAK_THRESHOLD:
-        last_outcome = history_str[-1]
-        streak_count = 0
-        for i in reversed(range(len(history_str))):
-            if history_str[i] == last_outcome:
-                streak_count += 1
-            else:
-                break
-        
-        if streak_count >= COUNTER_BIAS_STREAK_THRESHOLD:
-            # Check for instances where the streak broke in the past
-            break_count = 0
-            total_instances_checked = 0
-            for i in range(len(history_str) - streak_count):
-                if history_str[i : i + streak_count] == history_str[len(history_str) - streak_count:]: # Match the exact streak
-                    if (i + streak_count) < len(history_str):
-                        if history_str[i + streak_count] != last_outcome: # If it broke the streak
-                            break_count += 1
-                        total_instances_checked += 1
-            
-            if total_instances_checked > 0 and break_count > (total_instances_checked / 2): # If it broke more than half the time
-                return ('P' if last_outcome == 'B' else 'B'), COUNTER_PREDICTION_THRESHOLD, True # Predict counter with fixed threshold
+    # Counter Bias Logic (as present in V1.13): did earlier copies of the current streak mostly break?
+    last_outcome, streak_count = road.streak()
+    if streak_count >= config.counter_bias_streak_threshold:
+        break_count, total_instances_checked = road.streak_break_stats(last_outcome, streak_count)
+        if total_instances_checked > 0 and break_count > (total_instances_checked / 2): # If it broke more than half the time
+            return ('P' if last_outcome == 'B' else 'B'), config.counter_prediction_threshold, True # Predict counter with fixed threshold
 
     # Simple Intuition (Two-cut, etc. from V1.13)
+    last_3 = road.last(3)
+    last_2 = last_3[-2:]
     if last_3 == "BBP" or last_3 == "PBB":
         return ('P' if last_3[-1] == 'B' else 'B'), 0.6, False
     if last_3 == "PPB" or last_3 == "BPP":
@@ -112,65 +601,792 @@ def analyze_intuition(history_str):
         
     return None, 0, False
 
-def predict_outcome(history_list):
-    history_str = get_latest_history_string(history_list)
+def predict_outcome(history_list, config=DEFAULT_CONFIG, ngram=None):
+    # ngram: an NGramModel of the whole history, for the long-horizon signal (not used when None)
+    history_str = get_latest_history_string(history_list, config.max_history_for_analysis)
+    m = metrics
     
-    if len(history_str) < MIN_HISTORY_FOR_PREDICTION:
-        return {"prediction": "ไม่เพียงพอ", "confidence": 0, "predicted_by": [], "is_counter": False}
+    if len(history_str) < config.min_history_for_prediction:
+        result = {"prediction": "ไม่เพียงพอ", "confidence": 0, "predicted_by": [], "is_counter": False}
+        if m is not None:
+            m.observe_prediction(result)
+        return result
 
-    predictions = []
-    
-    # Run all analysis modules
-    dna_pred, dna_conf = analyze_dna_pattern(history_str)
-    if dna_pred:
-        predictions.append({"outcome": dna_pred, "confidence": dna_conf, "source": "DNA"})
-
-    momentum_pred, momentum_conf = analyze_momentum(history_str)
-    if momentum_pred:
-        predictions.append({"outcome": momentum_pred, "confidence": momentum_conf, "source": "Momentum"})
-
-    intuition_pred, intuition_conf, is_counter_intuition = analyze_intuition(history_str)
-    if intuition_pred:
-        predictions.append({"outcome": intuition_pred, "confidence": intuition_conf, "source": "Intuition", "is_counter": is_counter_intuition})
+    # Run the registered analysis modules
+    return ANALYZER_REGISTRY.evaluate(AnalysisWindow(history_str, config, ngram), len(history_str), config, m)[1]
+
+def combine_analyses(dna_result, momentum_result, intuition_result, config=DEFAULT_CONFIG):
+    # Turns the raw results of the three built-in analyzers into the final prediction dict
+    return combine_results((("DNA", dna_result), ("Momentum", momentum_result), ("Intuition", intuition_result)), config)
+
+def combine_results(results, config=DEFAULT_CONFIG):
+    # results: ((source name, (outcome, confidence[, is_counter])), ...) in registration order
+    predictions = [(result[0], result[1], source, len(result) > 2 and result[2]) for source, result in results if result[0]]
     
     if not predictions:
         return {"prediction": "ไม่พบรูปแบบ", "confidence": 0, "predicted_by": [], "is_counter": False}
 
     # Prioritize Counter prediction if it's confident (V1.13 logic)
-    for p in predictions:
-        if p.get('is_counter', False) and p['confidence'] >= COUNTER_PREDICTION_THRESHOLD:
-            return {"prediction": p['outcome'], 
-                    "confidence": p['confidence'], 
-                    "predicted_by": [p['source']], 
+    for outcome, confidence, source, is_counter in predictions:
+        if is_counter and confidence >= config.counter_prediction_threshold:
+            return {"prediction": outcome, 
+                    "confidence": confidence, 
+                    "predicted_by": [source], 
                     "is_counter": True}
 
-    # Combine other predictions (V1.13 logic)
-    outcome_scores = Counter()
+    # Combine the other predictions (V1.13 logic); any counter left here is a weak one
+    outcome_scores = {}
     outcome_sources = {}
     is_any_counter_in_other_preds = False
 
-    for p in predictions:
-        # Only include non-counter or weak-counter predictions here
-        if not p.get('is_counter', False) or p['confidence'] < COUNTER_PREDICTION_THRESHOLD:
-            outcome_scores[p['outcome']] += p['confidence']
-            if p['outcome'] not in outcome_sources:
-                outcome_sources[p['outcome']] = []
-            outcome_sources[p['outcome']].append(p['source'])
-            if p.get('is_counter', False): # Track if any source was counter even if not primary
-                is_any_counter_in_other_preds = True
-
-    if not outcome_scores:
-        return {"prediction": "ไม่พบรูปแบบ", "confidence": 0, "predicted_by": [], "is_counter": False}
+    for outcome, confidence, source, is_counter in predictions:
+        outcome_scores[outcome] = outcome_scores.get(outcome, 0) + confidence
+        if outcome not in outcome_sources:
+            outcome_sources[outcome] = []
+        outcome_sources[outcome].append(source)
+        if is_counter: # Track if any source was counter even if not primary
+            is_any_counter_in_other_preds = True
 
-    sorted_outcomes = sorted(outcome_scores.items(), key=lambda item: item[1], reverse=True)
-    
-    best_outcome = sorted_outcomes[0][0]
-    best_confidence = sorted_outcomes[0][1] / len(outcome_sources[best_outcome])
+    best_outcome = max(outcome_scores, key=outcome_scores.get) # First seen wins a tie, like the stable sort before
+    best_confidence = outcome_scores[best_outcome] / len(outcome_sources[best_outcome])
     
-    if best_confidence >= PREDICTION_THRESHOLD:
+    if best_confidence >= config.prediction_threshold:
         return {"prediction": best_outcome, 
                 "confidence": best_confidence, 
                 "predicted_by": outcome_sources[best_outcome],
                 "is_counter": is_any_counter_in_other_preds}
     else:
         return {"prediction": "ไม่ชัดเจน", "confidence": best_confidence, "predicted_by": outcome_sources[best_outcome], "is_counter": is_any_counter_in_other_preds}
+
+# --- Analyzer Registry ---
+# predict_outcome(), PredictionCache and OracleStream run the analyzers registered here, in
+# priority order (lowest first), against a source object: an AnalysisWindow or an OracleStream.
+# - A counter result at or above counter_prediction_threshold ends the evaluation: it overrides
+#   everything else, so the remaining analyzers are not run.
+# - Required analyzers otherwise always run. An optional analyzer is skipped once the ones still
+#   to run could neither change the winning outcome nor move its average across
+#   prediction_threshold (either way), going by their max_confidence and min_confidence.
+#   The prediction and is_counter are then the same as with every analyzer run; confidence and
+#   predicted_by only cover the analyzers that ran.
+# - An analyzer is not run while the window is shorter than its min_history (it could not fire),
+#   nor for a source that lacks one of the attributes it requires (e.g. .ngram): those are left
+#   out of the evaluation, bounds included, so they cost nothing per hand.
+# Results are combined in registration order, which is the order of predicted_by.
+
+AnalyzerSpec = namedtuple("AnalyzerSpec", ["name", "analyze", "priority", "min_history", "max_confidence",
+                                           "min_confidence", "required", "counter", "requires"])
+
+# The analyzers that can run for one set of available source attributes, by priority, with the
+# bounds _settled() uses from each position on
+_EvaluationPlan = namedtuple("_EvaluationPlan", ["specs", "last_required", "headroom", "counters", "bounds", "floors"])
+
+class AnalysisWindow:
+    # Analyzer source for a history string
+    def __init__(self, history_str, config=DEFAULT_CONFIG, ngram=None, dna_index=None):
+        self.history_str = history_str
+        self.config = config
+        self.ngram = ngram
+        self.dna_index = dna_index
+
+    def __len__(self):
+        return len(self.history_str)
+
+    def history_string(self):
+        return self.history_str
+
+    def analyze_dna_pattern(self):
+        return analyze_dna_pattern(self.history_str, self.config)
+
+    def analyze_momentum(self):
+        return analyze_momentum(self.history_str, self.config)
+
+    def analyze_intuition(self):
+        return analyze_intuition(self.history_str, self.config)
+
+    def analyze_ngram(self):
+        return self.ngram.analyze() if self.ngram is not None else (None, 0)
+
+    def analyze_dna_context(self):
+        return self.dna_index.analyze(DNA_CONTEXT_MIN_MATCHES) if self.dna_index is not None else (None, 0)
+
+class AnalyzerRegistry:
+    def __init__(self):
+        self.version = 0 # Bumped on every change (PredictionCache drops its entries)
+        self._specs = [] # Registration order
+        self._names = []
+        self._requires = () # Every source attribute some analyzer requires
+        self._plans = {} # Availability of each of _requires -> _EvaluationPlan
+
+    def register(self, name, analyze, priority, min_history=0, max_confidence=1.0, min_confidence=0.0,
+                 required=False, counter=False, requires=()):
+        # analyze(source) -> (outcome or None, confidence[, is_counter]); min_confidence/max_confidence:
+        # bounds on the confidence of a result with an outcome; counter: it may return counter
+        # results (only confident ones end the evaluation early); requires: names of source
+        # attributes it needs (not run where one is missing or None). Re-registering a name replaces it.
+        spec = AnalyzerSpec(name, analyze, priority, min_history, max_confidence, min_confidence, required, counter,
+                            tuple(requires))
+        names = self.names()
+        if name in names:
+            self._specs[names.index(name)] = spec
+        else:
+            self._specs.append(spec)
+        self._reorder()
+        return spec
+
+    def unregister(self, name):
+        self._specs = [spec for spec in self._specs if spec.name != name]
+        self._reorder()
+
+    def _reorder(self):
+        self._names = [spec.name for spec in self._specs]
+        self._requires = tuple(sorted({attribute for spec in self._specs for attribute in spec.requires}))
+        self._plans = {}
+        self.version += 1
+
+    def _plan(self, available):
+        # available: a bool per name in _requires
+        present = {attribute for attribute, found in zip(self._requires, available) if found}
+        specs = sorted((spec for spec in self._specs if present.issuperset(spec.requires)), key=lambda spec: spec.priority)
+        # Bounds on what the analyzers from position i on can still add, for _settled
+        plan = self._plans[available] = _EvaluationPlan(
+            specs, max((i for i, spec in enumerate(specs) if spec.required), default=-1),
+            [sum(spec.max_confidence for spec in specs[i:]) for i in range(len(specs))],
+            [any(spec.counter for spec in specs[i:]) for i in range(len(specs))],
+            [sorted((spec.max_confidence for spec in specs[i:]), reverse=True) for i in range(len(specs))],
+            [sorted(spec.min_confidence for spec in specs[i:]) for i in range(len(specs))])
+        return plan
+
+    def names(self):
+        return list(self._names)
+
+    def specs(self):
+        return list(self._specs)
+
+    def _settled(self, plan, scores, counts, i, config):
+        # True when the optional analyzers from position i of the plan on cannot change the
+        # outcome or move it across the threshold, whatever they return
+        if not scores:
+            return False # Any of them firing would turn "no pattern" into a prediction
+        if plan.counters[i]:
+            return False # Even a weak counter result would change is_counter
+        best = max(scores, key=scores.get)
+        headroom = plan.headroom[i]
+        if any(scores.get(outcome, 0) + headroom >= scores[best] for outcome in OUTCOMES if outcome != best):
+            return False
+        # The average moves furthest when the k strongest (or weakest) of them all agree with the leader
+        above = scores[best] / counts[best] >= config.prediction_threshold
+        total, count = scores[best], counts[best]
+        for bound in plan.floors[i] if above else plan.bounds[i]:
+            total += bound
+            count += 1
+            if (total / count >= config.prediction_threshold) != above:
+                return False
+        return True
+
+    def evaluate(self, source, window_length, config=DEFAULT_CONFIG, m=None):
+        # -> ({name: result} of the analyzers that ran, prediction dict). m: a Metrics to report to
+        clock = time.perf_counter
+        results = {}
+        scores = counts = None # Tallied once the optional analyzers start
+        available = tuple(getattr(source, attribute, None) is not None for attribute in self._requires)
+        plan = self._plans.get(available) or self._plan(available)
+        specs = plan.specs
+        last_required = plan.last_required
+        for i, (name, analyze, _, min_history, _, _, _, counter, _) in enumerate(specs):
+            if i > last_required:
+                if scores is None:
+                    scores, counts = {}, {}
+                    for outcome, confidence, *_ in results.values():
+                        if outcome:
+                            scores[outcome] = scores.get(outcome, 0) + confidence
+                            counts[outcome] = counts.get(outcome, 0) + 1
+                if self._settled(plan, scores, counts, i, config):
+                    if m is not None:
+                        for skipped in specs[i:]:
+                            m.observe_skipped(skipped.name)
+                    break
+            if window_length < min_history:
+                continue
+            if m is None:
+                result = analyze(source)
+            else:
+                start = clock()
+                result = analyze(source)
+                m.observe_analyzer(name, result, clock() - start)
+            results[name] = result
+            if counter and result[2] and result[1] >= config.counter_prediction_threshold:
+                prediction = {"prediction": result[0], "confidence": result[1], "predicted_by": [name], "is_counter": True}
+                if m is not None:
+                    for skipped in specs[i + 1:]:
+                        m.observe_skipped(skipped.name)
+                    m.observe_prediction(prediction, override=True)
+                return results, prediction
+            if scores is not None and result[0]:
+                scores[result[0]] = scores.get(result[0], 0) + result[1]
+                counts[result[0]] = counts.get(result[0], 0) + 1
+
+        ordered = [(name, results[name]) for name in self._names if name in results]
+        if m is None:
+            return results, combine_results(ordered, config)
+        start = clock()
+        prediction = combine_results(ordered, config)
+        m.observe_prediction(prediction, clock() - start)
+        return results, prediction
+
+ANALYZER_REGISTRY = AnalyzerRegistry()
+# Intuition runs first: its counter-bias override makes the other analyzers irrelevant.
+# min_history values are lower bounds for any EngineConfig; max_confidence / min_confidence:
+# highest / lowest confidence of a result. The three V1.13 analyzers are required, so
+# predict_outcome() results do not depend on the registry's short-circuit.
+ANALYZER_REGISTRY.register("DNA", methodcaller("analyze_dna_pattern"), priority=10,
+                           min_history=2, max_confidence=1.0, required=True)
+ANALYZER_REGISTRY.register("Momentum", methodcaller("analyze_momentum"), priority=20,
+                           min_history=5, max_confidence=0.70, required=True)
+ANALYZER_REGISTRY.register("Intuition", methodcaller("analyze_intuition"), priority=0,
+                           min_history=3, max_confidence=1.0, required=True, counter=True)
+# Long-horizon signal; only runs for sources that carry an NGramModel (.ngram). Optional: it is
+# not run once the V1.13 analyzers have decided the prediction either way.
+ANALYZER_REGISTRY.register("NGram", methodcaller("analyze_ngram"), priority=30,
+                           min_history=0, max_confidence=1.0, min_confidence=NGRAM_MIN_CONFIDENCE,
+                           requires=("ngram",))
+# The DNA analyzer over the whole history; only runs for sources that carry a DNAIndex (.dna_index).
+# Optional like NGram. The most common of up to three followers holds at least a third of them.
+ANALYZER_REGISTRY.register("DNAContext", methodcaller("analyze_dna_context"), priority=40,
+                           min_history=0, max_confidence=1.0, min_confidence=1 / len(OUTCOMES),
+                           requires=("dna_index",))
+
+# --- Instrumentation ---
+# While enable_metrics() is in effect, AnalyzerRegistry.evaluate() times each analyzer and the
+# combine step and reports them to an oracle_metrics.Metrics. Disabled (metrics is None), the
+# only cost is one check per prediction.
+
+metrics = None
+
+def enable_metrics(registry=None):
+    global metrics
+    if registry is None:
+        from oracle_metrics import Metrics
+        registry = Metrics()
+    metrics = registry
+    return registry
+
+def disable_metrics():
+    global metrics
+    metrics = None
+
+def get_metrics():
+    return metrics
+
+# --- Prediction Cache ---
+# predict_outcome() only depends on the analysis window and the config, so results are
+# memoized per window. The key packs the window 2 bits per hand (base 4 with a leading 1,
+# which keeps windows of different lengths apart). Cached results are shared: treat them
+# as read-only.
+
+_WINDOW_KEY_DIGITS = str.maketrans(OUTCOMES, "012")
+
+def window_key(history_str):
+    return int("1" + history_str.translate(_WINDOW_KEY_DIGITS), 4)
+
+CachedAnalysis = namedtuple("CachedAnalysis", ["dna", "momentum", "intuition", "prediction"])
+
+class PredictionCache:
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE, config=DEFAULT_CONFIG):
+        self.maxsize = maxsize
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self._registry_version = ANALYZER_REGISTRY.version
+        self._entries = OrderedDict() # window key -> CachedAnalysis, least recently used first
+        self._lock = threading.Lock() # Streamlit sessions share one cache across threads
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_config(self, config):
+        # Results depend on the config, so changing it drops everything cached
+        with self._lock:
+            if config != self.config:
+                self.config = config
+                self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def analyze(self, history_list, config=None):
+        # Per-analyzer results plus the predict_outcome() dict for the current window
+        if config is not None and config != self.config:
+            self.set_config(config)
+        config = self.config
+        registry_version = ANALYZER_REGISTRY.version
+        history_str = get_latest_history_string(history_list, config.max_history_for_analysis)
+        key = window_key(history_str)
+        with self._lock:
+            if registry_version != self._registry_version: # Analyzers were (un)registered
+                self._registry_version = registry_version
+                self._entries.clear()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        if len(history_str) < config.min_history_for_prediction:
+            prediction = {"prediction": "ไม่เพียงพอ", "confidence": 0, "predicted_by": [], "is_counter": False}
+            if metrics is not None:
+                metrics.observe_prediction(prediction)
+            results = {}
+        else:
+            results, prediction = ANALYZER_REGISTRY.evaluate(AnalysisWindow(history_str, config), len(history_str),
+                                                             config, metrics)
+        # Analyzers that were not run (decided without them) are None
+        entry = CachedAnalysis(results.get("DNA"), results.get("Momentum"), results.get("Intuition"), prediction)
+
+        with self._lock:
+            # Not if the config or the analyzers changed meanwhile
+            if config == self.config and registry_version == self._registry_version and self.maxsize > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def predict(self, history_list, config=None):
+        # Same result as predict_outcome(history_list, config)
+        return self.analyze(history_list, config).prediction
+
+# --- Streaming Predictor ---
+# Keeps the statistics of the analysis window up to date as each hand arrives,
+# so push()/pop() cost O(1) amortized instead of rescanning the history string.
+# The results are identical to predict_outcome() on the same history.
+
+class OracleStream:
+    def __init__(self, outcomes=(), max_length=None, config=DEFAULT_CONFIG):
+        self.config = config
+        self.max_length = max_length # Same truncation as MAX_HISTORY_DISPLAY in app.py (None = unbounded)
+        window = config.max_history_for_analysis
+        self.window_size = window if max_length is None else min(window, max_length)
+        self._outcomes = []
+        self._base = 0 # Absolute position of self._outcomes[0]
+        self._first = 0 # Absolute position of the oldest outcome still kept
+        self._end = 0 # Absolute position after the newest outcome
+        # DNA: (position, pattern, follower) pairs inside the window, plus positions per pattern/follower
+        self._dna_pairs = deque()
+        self._dna_followers = {}
+        # Momentum / Intuition: run-length road of the window
+        self._road = BigRoad()
+        # Big Eye Boy / Small Road / Cockroach Pig over every hand pushed (not limited to the window)
+        self.derived_roads = DerivedRoads()
+        # Optional NGramModel and DNAIndex over the whole history, kept up to date by the owner
+        # (see TableState): they add the NGram and DNAContext signals to prediction()
+        self.ngram = None
+        self.dna_index = None
+        self.analysis = {} # {analyzer name: result} behind the last prediction() (the ones that ran)
+        for outcome in outcomes:
+            self._push(outcome)
+
+    def __len__(self):
+        return self._end - self._first
+
+    def _window_start(self):
+        return max(self._first, self._end - self.window_size)
+
+    def _at(self, position):
+        return self._outcomes[position - self._base]
+
+    def history_string(self):
+        # Same string get_latest_history_string() returns for the kept history
+        return "".join(self._outcomes[self._window_start() - self._base:])
+
+    # -- DNA pair bookkeeping --
+
+    def _dna_pair(self, position):
+        pattern = "".join(self._outcomes[position - self.config.dna_pattern_length - self._base : position - self._base])
+        return (position, pattern, self._at(position))
+
+    def _dna_add(self, pair, front=False):
+        position, pattern, follower = pair
+        positions = self._dna_followers.setdefault(pattern, {}).setdefault(follower, deque())
+        if front:
+            self._dna_pairs.appendleft(pair)
+            positions.appendleft(position)
+        else:
+            self._dna_pairs.append(pair)
+            positions.append(position)
+
+    def _dna_remove(self, front=False):
+        position, pattern, follower = self._dna_pairs.popleft() if front else self._dna_pairs.pop()
+        followers = self._dna_followers[pattern]
+        positions = followers[follower]
+        if front:
+            positions.popleft()
+        else:
+            positions.pop()
+        if not positions:
+            del followers[follower]
+            if not followers:
+                del self._dna_followers[pattern]
+
+    # -- Updates --
+
+    def push(self, outcome):
+        self._push(outcome)
+        return self.prediction()
+
+    def _push(self, outcome):
+        old_start = self._window_start()
+        self._outcomes.append(outcome)
+        self._end += 1
+        if self.max_length is not None and self._end - self._first > self.max_length:
+            self._first += 1
+            if self._first - self._base > max(self.max_length, 64): # Drop the unused prefix in amortized O(1)
+                del self._outcomes[:self._first - self._base]
+                self._base = self._first
+        new_start = self._window_start()
+
+        self._road.push(outcome)
+        for _ in range(old_start, new_start):
+            self._road.pop_front()
+        self.derived_roads.push(outcome)
+
+        pattern_length = self.config.dna_pattern_length
+        while self._dna_pairs and self._dna_pairs[0][0] < new_start + pattern_length:
+            self._dna_remove(front=True)
+        position = self._end - 1
+        if position - pattern_length >= new_start:
+            self._dna_add(self._dna_pair(position))
+
+    def pop(self):
+        if self._end == self._first:
+            raise IndexError("pop from empty OracleStream")
+        old_start = self._window_start()
+        position = self._end - 1
+
+        self._road.pop()
+        self.derived_roads.pop()
+        if self._dna_pairs and self._dna_pairs[-1][0] == position:
+            self._dna_remove()
+
+        self._outcomes.pop()
+        self._end -= 1
+        self._grow_front(old_start)
+        return self.prediction()
+
+    def push_front(self, outcome):
+        # Puts back a hand older than every kept one, e.g. one a bounded stream dropped before
+        # a pop(). The derived roads are left alone (they still cover it), and nothing is
+        # predicted: call prediction() once the front is refilled.
+        if self.max_length is not None and self._end - self._first >= self.max_length:
+            raise IndexError("push_front to a full OracleStream")
+        old_start = self._window_start()
+        if self._first == self._base:
+            self._outcomes.insert(0, outcome)
+            self._base -= 1
+        else:
+            self._outcomes[self._first - 1 - self._base] = outcome
+        self._first -= 1
+        self._grow_front(old_start)
+
+    def _grow_front(self, old_start):
+        for start in reversed(range(self._window_start(), old_start)): # The window grows back at the front
+            self._road.push_front(self._at(start))
+            pair_position = start + self.config.dna_pattern_length
+            if pair_position < self._end and (not self._dna_pairs or self._dna_pairs[0][0] > pair_position):
+                self._dna_add(self._dna_pair(pair_position), front=True)
+
+    # -- Analysis (same results as the analyze_* functions on history_string()) --
+
+    def _window_length(self):
+        return self._end - self._window_start()
+
+    def _last(self, count):
+        return "".join(self._outcomes[len(self._outcomes) - count:])
+
+    def analyze_dna_pattern(self):
+        if self._window_length() < self.config.dna_pattern_length:
+            return None, 0
+        followers = self._dna_followers.get(self._last(self.config.dna_pattern_length))
+        if not followers:
+            return None, 0
+        # Ties go to the follower seen first in the window, like Counter.most_common()
+        predicted_outcome, positions = max(followers.items(), key=lambda item: (len(item[1]), -item[1][0]))
+        total_matches = sum(len(p) for p in followers.values())
+        return predicted_outcome, len(positions) / total_matches
+
+    def analyze_momentum(self):
+        return momentum_from_road(self._road, self.config)
+
+    def analyze_intuition(self):
+        return intuition_from_road(self._road, self.config)
+
+    def analyze_ngram(self):
+        return self.ngram.analyze() if self.ngram is not None else (None, 0)
+
+    def analyze_dna_context(self):
+        return self.dna_index.analyze(DNA_CONTEXT_MIN_MATCHES) if self.dna_index is not None else (None, 0)
+
+    def analyze_derived_roads(self):
+        # {road name: (outcome, confidence)}; extra signals, not part of prediction()
+        return self.derived_roads.analyze_all()
+
+    def prediction(self):
+        m = metrics
+        window_length = self._window_length()
+        if window_length < self.config.min_history_for_prediction:
+            self.analysis = {}
+            result = {"prediction": "ไม่เพียงพอ", "confidence": 0, "predicted_by": [], "is_counter": False}
+            if m is not None:
+                m.observe_prediction(result)
+            return result
+        self.analysis, result = ANALYZER_REGISTRY.evaluate(self, window_length, self.config, m)
+        return result
+
+# --- Long-Context DNA Index ---
+# Follower counts for every pattern length DNA_CONTEXT_MIN_LENGTH..DNA_CONTEXT_MAX_LENGTH over the
+# whole history, not just the last MAX_HISTORY_FOR_ANALYSIS hands. Patterns are rolling base-3
+# integers (newest hand in the lowest digit), so push()/pop() and every query cost O(k) whatever
+# the history length. With min_length == max_length == k, analyze() gives the same result as
+# analyze_dna_pattern() on the full history string with DNA_PATTERN_LENGTH = k.
+
+_DNA_INDEX_HEADER = struct.Struct("<8sBBQQ") # magic, min_length, max_length, hands, suffix
+_DNA_INDEX_MAGIC = b"ORDNAIX1"
+
+class DNAIndex:
+    def __init__(self, outcomes=(), min_length=DNA_CONTEXT_MIN_LENGTH, max_length=DNA_CONTEXT_MAX_LENGTH):
+        if not 1 <= min_length <= max_length:
+            raise ValueError("DNAIndex needs 1 <= min_length <= max_length")
+        self.min_length = min_length
+        self.max_length = max_length
+        self._codes = bytearray()
+        self._suffix = 0 # Base-3 code of the last max_length hands
+        self._powers = [len(OUTCOMES) ** k for k in range(max_length + 1)]
+        # _followers[k][pattern] = [count per follower code..., first position per follower code...]
+        self._followers = [{} for _ in range(max_length + 1)]
+        for outcome in outcomes:
+            self.push(outcome)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def codes(self):
+        # OUTCOME_CODES of every hand pushed, as bytes
+        return bytes(self._codes)
+
+    def _lengths(self):
+        return range(self.min_length, min(self.max_length, len(self._codes)) + 1)
+
+    def push(self, outcome):
+        code = OUTCOME_CODES[outcome]
+        position = len(self._codes)
+        for k in self._lengths(): # The last k hands are a pattern that `outcome` followed
+            entry = self._followers[k].setdefault(self._suffix % self._powers[k], [0] * (2 * len(OUTCOMES)))
+            if not entry[code]:
+                entry[len(OUTCOMES) + code] = position
+            entry[code] += 1
+        self._codes.append(code)
+        self._suffix = (self._suffix * len(OUTCOMES) + code) % self._powers[self.max_length]
+
+    def pop(self):
+        if not self._codes:
+            raise IndexError("pop from empty DNAIndex")
+        code = self._codes.pop()
+        self._suffix //= len(OUTCOMES)
+        if len(self._codes) >= self.max_length: # Bring back the hand that had dropped out of the suffix
+            self._suffix += self._codes[-self.max_length] * self._powers[self.max_length - 1]
+        for k in self._lengths():
+            pattern = self._suffix % self._powers[k]
+            entry = self._followers[k][pattern]
+            entry[code] -= 1
+            if not any(entry[:len(OUTCOMES)]):
+                del self._followers[k][pattern]
+        return OUTCOMES[code]
+
+    def followers(self, length):
+        # {outcome: count} of what followed the current last `length` hands, in first-seen order
+        if not self.min_length <= length <= min(self.max_length, len(self._codes)):
+            return {}
+        entry = self._followers[length].get(self._suffix % self._powers[length])
+        if entry is None:
+            return {}
+        codes = sorted((code for code in range(len(OUTCOMES)) if entry[code]), key=lambda code: entry[len(OUTCOMES) + code])
+        return {OUTCOMES[code]: entry[code] for code in codes}
+
+    def longest_context(self, min_matches=1):
+        # (length, followers) for the longest current suffix seen at least min_matches times before
+        for length in reversed(self._lengths()):
+            followers = self.followers(length)
+            if sum(followers.values()) >= min_matches:
+                return length, followers
+        return 0, {}
+
+    def analyze(self, min_matches=1):
+        # Same (outcome, confidence) shape as analyze_dna_pattern(), using the longest matching context
+        length, followers = self.longest_context(min_matches)
+        if not followers:
+            return None, 0
+        predicted_outcome, count = Counter(followers).most_common(1)[0] # Ties go to the first-seen follower
+        return predicted_outcome, count / sum(followers.values())
+
+    # -- Checkpoints --
+
+    def checkpoint(self):
+        # The whole state as bytes: a header, the outcome codes and one row of
+        # (length, pattern, counts..., first positions...) per follower entry
+        rows = array("q")
+        for k in range(self.min_length, self.max_length + 1):
+            for pattern, entry in self._followers[k].items():
+                rows.append(k)
+                rows.append(pattern)
+                rows.extend(entry)
+        return (_DNA_INDEX_HEADER.pack(_DNA_INDEX_MAGIC, self.min_length, self.max_length, len(self._codes),
+                                       self._suffix) + bytes(self._codes) + rows.tobytes())
+
+    @classmethod
+    def restore(cls, data):
+        magic, min_length, max_length, hands, suffix = _DNA_INDEX_HEADER.unpack_from(data)
+        if magic != _DNA_INDEX_MAGIC:
+            raise ValueError("Not a DNAIndex checkpoint")
+        index = cls(min_length=min_length, max_length=max_length)
+        data = memoryview(data)[_DNA_INDEX_HEADER.size:]
+        index._codes = bytearray(data[:hands])
+        rows = array("q")
+        rows.frombytes(data[hands:])
+        width = 2 + 2 * len(OUTCOMES)
+        if len(index._codes) != hands or len(rows) % width:
+            raise ValueError("Truncated DNAIndex checkpoint")
+        followers = index._followers
+        for i in range(0, len(rows), width):
+            followers[rows[i]][rows[i + 1]] = rows[i + 2:i + width].tolist()
+        index._suffix = suffix
+        return index
+
+# --- Decayed N-gram Model ---
+# Exponentially decayed counts of the outcome that followed every context of 1..order hands,
+# over the whole history. Counts live in one fixed array indexed by the packed base-3 context
+# (newest hand in the lowest digit), so memory does not grow with the history and push()/pop()
+# touch `order` cells. Decay is applied lazily: each hand is added with weight scale, which
+# grows by 1 / decay per hand, and counts / scale are the decayed weights; the array is
+# rescaled to scale 1 before scale can overflow (every ~172k hands at the default decay).
+
+NGRAM_RESCALE_LIMIT = 1e150
+_NGRAM_HEADER = struct.Struct("<8sBdQQd") # magic, order, decay, hands, suffix, scale
+_NGRAM_MAGIC = b"ORNGRAM1"
+
+class NGramModel:
+    def __init__(self, outcomes=(), order=NGRAM_ORDER, decay=NGRAM_DECAY):
+        if order < 1 or not 0 < decay <= 1:
+            raise ValueError("NGramModel needs order >= 1 and 0 < decay <= 1")
+        self.order = order
+        self.decay = decay
+        self._growth = 1 / decay
+        self._powers = [len(OUTCOMES) ** k for k in range(order + 1)]
+        # Context k (length, pattern) owns cells (_offsets[k] + pattern) * 3 .. + 2, one per follower
+        self._offsets = [sum(self._powers[1:k]) for k in range(order + 1)]
+        self._counts = array("d", bytes(8 * len(OUTCOMES) * self._offsets[order] + 8 * len(OUTCOMES) * self._powers[order]))
+        self.hands = 0
+        self._suffix = 0 # Base-3 code of the last `order` hands
+        self._scale = 1.0
+        for outcome in outcomes:
+            self.push(outcome)
+
+    def __len__(self):
+        return self.hands
+
+    def _cell(self, length, suffix):
+        return (self._offsets[length] + suffix % self._powers[length]) * len(OUTCOMES)
+
+    def _rescale(self):
+        factor = 1 / self._scale
+        self._counts = array("d", (count * factor for count in self._counts))
+        self._scale = 1.0
+
+    def push(self, outcome):
+        code = OUTCOME_CODES[outcome]
+        if self._scale > NGRAM_RESCALE_LIMIT:
+            self._rescale()
+        self._scale *= self._growth
+        counts, suffix, scale = self._counts, self._suffix, self._scale
+        for k in range(1, min(self.order, self.hands) + 1): # The last k hands are a context `outcome` followed
+            counts[self._cell(k, suffix) + code] += scale
+        self._suffix = (suffix * len(OUTCOMES) + code) % self._powers[self.order]
+        self.hands += 1
+
+    def pop(self, before):
+        # Takes back the last push(). before: the outcomes that preceded the popped hand (only
+        # the last `order` are used), which a fixed-size model does not keep. Exact up to float
+        # rounding, which grows with scale: fine for undo, not for unwinding thousands of hands.
+        if not self.hands:
+            raise IndexError("pop from empty NGramModel")
+        before = before[-self.order:] if self.hands > 1 else ""
+        if len(before) != min(self.order, self.hands - 1):
+            raise ValueError(f"pop needs the {min(self.order, self.hands - 1)} hands before the popped one")
+        suffix = 0
+        for outcome in before:
+            suffix = suffix * len(OUTCOMES) + OUTCOME_CODES[outcome]
+        if suffix % self._powers[self.order - 1] != self._suffix // len(OUTCOMES):
+            raise ValueError("before does not match the hands this model has seen")
+        code = self._suffix % len(OUTCOMES)
+        self.hands -= 1
+        counts, scale = self._counts, self._scale
+        for k in range(1, min(self.order, self.hands) + 1):
+            cell = self._cell(k, suffix) + code
+            counts[cell] = max(0.0, counts[cell] - scale)
+        self._suffix = suffix
+        self._scale = scale / self._growth
+        return OUTCOMES[code]
+
+    def followers(self, length):
+        # {outcome: decayed weight} of what followed the current last `length` hands
+        if not 1 <= length <= min(self.order, self.hands):
+            return {}
+        cell = self._cell(length, self._suffix)
+        return {outcome: self._counts[cell + code] / self._scale for code, outcome in enumerate(OUTCOMES)
+                if self._counts[cell + code]}
+
+    def context(self, min_evidence=NGRAM_MIN_EVIDENCE):
+        # (length, followers) for the longest current context with at least min_evidence weight
+        for length in range(min(self.order, self.hands), 0, -1):
+            followers = self.followers(length)
+            if sum(followers.values()) >= min_evidence:
+                return length, followers
+        return 0, {}
+
+    def analyze(self, min_evidence=NGRAM_MIN_EVIDENCE, min_confidence=NGRAM_MIN_CONFIDENCE):
+        # Same (outcome, confidence) shape as analyze_dna_pattern(): the heaviest follower of the
+        # longest context with enough evidence, if it holds at least min_confidence of the weight
+        _, followers = self.context(min_evidence)
+        if not followers:
+            return None, 0
+        predicted_outcome = max(followers, key=followers.get) # Ties go to P, then B
+        confidence = followers[predicted_outcome] / sum(followers.values())
+        if confidence < min_confidence:
+            return None, 0
+        return predicted_outcome, confidence
+
+    # -- Checkpoints --
+
+    def checkpoint(self):
+        # The whole state as bytes (a header and the raw count array)
+        return _NGRAM_HEADER.pack(_NGRAM_MAGIC, self.order, self.decay, self.hands, self._suffix,
+                                  self._scale) + self._counts.tobytes()
+
+    @classmethod
+    def restore(cls, data):
+        magic, order, decay, hands, suffix, scale = _NGRAM_HEADER.unpack_from(data)
+        if magic != _NGRAM_MAGIC:
+            raise ValueError("Not an NGramModel checkpoint")
+        model = cls(order=order, decay=decay)
+        counts = array("d")
+        counts.frombytes(memoryview(data)[_NGRAM_HEADER.size:])
+        if len(counts) != len(model._counts):
+            raise ValueError("Truncated NGramModel checkpoint")
+        model._counts = counts
+        model.hands, model._suffix, model._scale = hands, suffix, scale
+        return model
@@ -0,0 +1,177 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from oracle_engine import DEFAULT_CONFIG, OUTCOMES
+from oracle_backtest import PAD, backtest
+
+# --- Bulk Ingest ---
+# Scores the engine on large CSV/Parquet exports of table histories. Files are read in
+# chunks of rows, outcomes are normalized to OUTCOME_CODES, and each table's hands are
+# predicted in file order with the vectorized backtest. A table only carries its last
+# max_history_for_analysis hands from one chunk to the next (all a prediction looks at),
+# so memory depends on the chunk size and the number of tables, not on the file size.
+#
+#   python oracle_ingest.py roads.parquet more_roads.csv --table-column table_id \
+#       --outcome-column result --output per_table.csv
+
+CHUNK_SIZE = 1_000_000 # Rows per chunk
+SEGMENT_HANDS = 1024 # Hands of one table per backtest row
+OUTCOME_NAMES = {"P": 0, "PLAYER": 0, "B": 1, "BANKER": 1, "T": 2, "TIE": 2}
+REPORT_FIELDS = ["table", "hands", "predictions", "correct", "accuracy", "counter_predictions", "counter_correct",
+                 "counter_accuracy"]
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    # DataFrames of at most chunk_size rows from a CSV or Parquet file (by extension)
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet needs pyarrow (pip install pyarrow)") from None
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunk_size)
+
+
+def normalize(frame, table_column, outcome_column):
+    # -> (table ids, int8 outcome codes) of the rows with a recognized outcome
+    codes = frame[outcome_column].astype(str).str.strip().str.upper().map(OUTCOME_NAMES)
+    valid = codes.notna().to_numpy()
+    tables = frame[table_column].astype(str).to_numpy()[valid]
+    return tables, codes.to_numpy()[valid].astype(np.int8)
+
+
+class TableStreams:
+    # Per-table context between chunks; predict() scores the next hands of many tables at once
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.window = config.max_history_for_analysis
+        self._context = {} # table id -> int8 array of its last `window` hands
+
+    def predict(self, tables, codes):
+        # tables/codes: one entry per hand, each table's hands in order -> backtest arrays
+        # (prediction, confidence, predicted_by, is_counter) aligned with the input
+        if not len(tables):
+            return (np.empty(0, np.int8), np.empty(0), np.empty(0, np.uint8), np.empty(0, bool))
+        table_index, names = pd.factorize(tables)
+        order = np.argsort(table_index, kind="stable")
+        table_index, codes = table_index[order], codes[order]
+        starts = np.flatnonzero(np.r_[True, table_index[1:] != table_index[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+
+        rows = [] # (context, first hand, hands)
+        for start, end in zip(starts, ends):
+            name = names[table_index[start]]
+            context = self._context.get(name, codes[:0])
+            for first in range(start, end, SEGMENT_HANDS):
+                hands = codes[first:min(end, first + SEGMENT_HANDS)]
+                rows.append((context, first, hands))
+                context = np.concatenate([context, hands])[-self.window:]
+            self._context[name] = context
+
+        # As wide as the longest row: with many tables per chunk most rows are a few hands long
+        width = max(len(context) + len(hands) for context, _, hands in rows)
+        shoes = np.full((len(rows), width), PAD, dtype=np.int8)
+        for row, (context, first, hands) in enumerate(rows):
+            shoes[row, :len(context)] = context
+            shoes[row, len(context):len(context) + len(hands)] = hands
+        result = backtest(shoes, config=self.config)
+
+        # Pick each row's new hands (after its context) back out, in input order
+        lengths = [len(hands) for _, _, hands in rows]
+        row_of = np.repeat(np.arange(len(rows)), lengths)
+        column = np.arange(len(codes)) - np.repeat([first - len(context) for context, first, _ in rows], lengths)
+        unsort = np.empty_like(order)
+        unsort[order] = np.arange(len(order))
+        return tuple(result[key][row_of, column][unsort] for key in
+                     ("prediction", "confidence", "predicted_by", "is_counter"))
+
+
+def iter_predictions(paths, table_column="table", outcome_column="outcome", chunk_size=CHUNK_SIZE,
+                     config=DEFAULT_CONFIG, skipped=None):
+    # Yields one DataFrame per chunk: table, outcome, prediction (OUTCOME_CODES, or a
+    # backtest status code below 0), confidence, is_counter. Rows without a P/B/T outcome
+    # are dropped and counted in skipped["rows"] when a dict is passed.
+    streams = TableStreams(config)
+    for path in paths:
+        for frame in read_chunks(path, [table_column, outcome_column], chunk_size):
+            tables, codes = normalize(frame, table_column, outcome_column)
+            if skipped is not None:
+                skipped["rows"] = skipped.get("rows", 0) + len(frame) - len(codes)
+            prediction, confidence, _, is_counter = streams.predict(tables, codes)
+            yield pd.DataFrame({"table": tables, "outcome": codes, "prediction": prediction,
+                                "confidence": confidence, "is_counter": is_counter})
+
+
+class AccuracyReport:
+    def __init__(self):
+        self.tables = {} # table id -> [hands, predictions, correct, counter predictions, counter correct]
+
+    def add(self, chunk):
+        made = chunk["prediction"].to_numpy() >= 0
+        correct = made & (chunk["prediction"].to_numpy() == chunk["outcome"].to_numpy())
+        counter = made & chunk["is_counter"].to_numpy()
+        counts = pd.DataFrame({"table": chunk["table"], "hands": 1, "predictions": made, "correct": correct,
+                               "counter_predictions": counter, "counter_correct": correct & counter})
+        for table, row in counts.groupby("table", sort=False).sum().iterrows():
+            totals = self.tables.setdefault(table, [0] * 5)
+            for i, value in enumerate(row):
+                totals[i] += int(value)
+
+    @staticmethod
+    def _row(table, totals):
+        hands, predictions, correct, counter_predictions, counter_correct = totals
+        return [table, hands, predictions, correct, round(correct / predictions, 6) if predictions else 0.0,
+                counter_predictions, counter_correct,
+                round(counter_correct / counter_predictions, 6) if counter_predictions else 0.0]
+
+    def per_table(self):
+        return pd.DataFrame([self._row(table, totals) for table, totals in self.tables.items()], columns=REPORT_FIELDS)
+
+    def overall(self):
+        totals = [sum(column) for column in zip(*self.tables.values())] or [0] * 5
+        return dict(zip(REPORT_FIELDS, self._row(f"{len(self.tables)} tables", totals)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score the Oracle engine on CSV/Parquet table histories")
+    parser.add_argument("paths", nargs="+", help="CSV or Parquet files, rows in hand order within each table")
+    parser.add_argument("--table-column", default="table")
+    parser.add_argument("--outcome-column", default="outcome", help="P/B/T (or Player/Banker/Tie)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows read at a time")
+    parser.add_argument("--output", help="Per-table report CSV (default: not written)")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        if not os.path.exists(path):
+            parser.error(f"No such file: {path}")
+
+    report = AccuracyReport()
+    skipped = {}
+    try:
+        for chunk in iter_predictions(args.paths, args.table_column, args.outcome_column, args.chunk_size,
+                                      skipped=skipped):
+            report.add(chunk)
+            overall = report.overall()
+            print(f"\r{overall['hands']} hands, {overall['table']}, accuracy {overall['accuracy']:.4f}",
+                  end="", file=sys.stderr)
+    except (ValueError, KeyError, RuntimeError) as e: # Missing columns, unreadable files
+        parser.error(str(e))
+    print(file=sys.stderr)
+
+    if args.output:
+        report.per_table().to_csv(args.output, index=False)
+        print(f"per-table report -> {args.output}", file=sys.stderr)
+    overall = report.overall()
+    if skipped.get("rows"):
+        print(f"skipped {skipped['rows']} rows without a {'/'.join(OUTCOMES)} outcome", file=sys.stderr)
+    for field in REPORT_FIELDS[1:]:
+        print(f"{field}: {overall[field]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from oracle_engine import OUTCOMES, OUTCOME_CODES
+from oracle_backtest import STATUS_TEXT, SOURCE_BITS
+
+# --- Hand Ledger ---
+# Event log of one table: every recorded hand is one fixed-size record holding the outcome
+# and the prediction that was showing before it. Records are appended to a memory-mapped
+# file (or anonymous memory when no path is given), so a process crash loses nothing and
+# the prediction stats survive restarts.
+#
+#   header   8 bytes magic + <Q record count
+#   record   <bbBBId: outcome code, prediction (outcome code or STATUS_TEXT code),
+#            predicted_by (SOURCE_BITS mask), is_counter, counter streak before the hand,
+#            confidence
+#
+# The stats dict (same keys app.py shows) is kept up to date per record; pop() reverses
+# exactly what its record added, and the streak it reset is restored from the record.
+# Opening a ledger rebuilds the stats from all records with NumPy.
+
+MAGIC = b"ORACLEDG"
+HEADER = struct.Struct("<8sQ")
+RECORD = struct.Struct("<bbBBId")
+RECORD_DTYPE = np.dtype([("outcome", "i1"), ("prediction", "i1"), ("predicted_by", "u1"),
+                         ("is_counter", "u1"), ("streak_before", "<u4"), ("confidence", "<f8")])
+INITIAL_CAPACITY = 4096 # Records; the file doubles when full
+PREDICTION_CODES = {**OUTCOME_CODES, **{text: code for code, text in STATUS_TEXT.items()}}
+
+def new_stats():
+    return {"total_predictions": 0, "correct_predictions": 0,
+            "total_counter_predictions": 0, "correct_counter_predictions": 0,
+            "prediction_counts": {}, "prediction_wins": {}, "counter_streak_count": 0}
+
+def _decode_prediction(code, mask, is_counter, confidence):
+    return {"prediction": OUTCOMES[code] if code >= 0 else STATUS_TEXT[code],
+            "confidence": confidence,
+            "predicted_by": [source for source, bit in SOURCE_BITS if mask & bit],
+            "is_counter": bool(is_counter)}
+
+def _ordered_counts(codes):
+    # {outcome: count} in order of first appearance, like the dicts app.py builds hand by hand
+    counts = np.bincount(codes, minlength=len(OUTCOMES))
+    present = [code for code in range(len(OUTCOMES)) if counts[code]]
+    first = {code: int(np.argmax(codes == code)) for code in present}
+    return {OUTCOMES[code]: int(counts[code]) for code in sorted(present, key=first.get)}
+
+def replay_stats(records):
+    # Rebuilds the stats dict from a RECORD_DTYPE array
+    prediction = records["prediction"]
+    made = prediction >= 0
+    hit = made & (prediction == records["outcome"])
+    counter = made & (records["is_counter"] != 0)
+    stats = new_stats()
+    stats["total_predictions"] = int(np.count_nonzero(made))
+    stats["correct_predictions"] = int(np.count_nonzero(hit))
+    stats["total_counter_predictions"] = int(np.count_nonzero(counter))
+    stats["correct_counter_predictions"] = int(np.count_nonzero(hit & counter))
+    stats["prediction_counts"] = _ordered_counts(prediction[made])
+    stats["prediction_wins"] = _ordered_counts(prediction[hit])
+    # The streak grows on a correct counter prediction and resets on any other prediction
+    wins = (hit & counter)[made]
+    breaks = np.flatnonzero(~wins)
+    stats["counter_streak_count"] = len(wins) - 1 - int(breaks[-1]) if len(breaks) else len(wins)
+    return stats
+
+class HandLedger:
+    def __init__(self, path=None):
+        self.path = path
+        self._file = None
+        if path is not None and os.path.exists(path) and os.path.getsize(path):
+            self._file = open(path, "r+b")
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            magic, count = HEADER.unpack_from(self._map)
+            if magic != MAGIC or HEADER.size + count * RECORD.size > len(self._map):
+                self.close()
+                raise ValueError(f"{path} is not a hand ledger")
+            self._count = count
+        else:
+            self._count = 0
+            self._map = self._allocate(INITIAL_CAPACITY)
+            HEADER.pack_into(self._map, 0, MAGIC, 0)
+        self.stats = replay_stats(self._view())
+
+    def _allocate(self, capacity):
+        size = HEADER.size + capacity * RECORD.size
+        if self.path is None:
+            return mmap.mmap(-1, size)
+        if self._file is None:
+            self._file = open(self.path, "w+b")
+        self._file.truncate(size)
+        return mmap.mmap(self._file.fileno(), size)
+
+    def _grow(self):
+        old = self._map
+        capacity = 2 * (len(old) - HEADER.size) // RECORD.size
+        if self.path is None:
+            self._map = self._allocate(capacity)
+            self._map[:len(old)] = old
+        else:
+            old.flush()
+            self._map = self._allocate(capacity)
+        old.close()
+
+    def _view(self):
+        return np.frombuffer(self._map, RECORD_DTYPE, self._count, HEADER.size)
+
+    def __len__(self):
+        return self._count
+
+    def records(self):
+        # Copy of all records as a RECORD_DTYPE array
+        return self._view().copy()
+
+    def outcomes(self, count=None):
+        # The last `count` outcomes (all by default) as a "PBT" string
+        return self.outcome_range(0 if count is None else self._count - count)
+
+    def outcome_codes(self, start=0, stop=None):
+        # OUTCOME_CODES of hands start..stop-1 (clamped to the recorded hands) as bytes
+        stop = self._count if stop is None else min(stop, self._count)
+        start = min(max(0, start), stop)
+        return self._map[HEADER.size + start * RECORD.size : HEADER.size + stop * RECORD.size : RECORD.size]
+
+    def outcome_range(self, start, stop=None):
+        # Outcomes of hands start..stop-1 (clamped to the recorded hands) as a "PBT" string
+        return "".join(OUTCOMES[code] for code in self.outcome_codes(start, stop))
+
+    def append(self, outcome, prediction):
+        # Records a hand and the prediction that was showing for it, and scores that prediction
+        stats = self.stats
+        predicted_outcome = prediction['prediction']
+        is_counter = bool(prediction['is_counter'])
+        offset = HEADER.size + self._count * RECORD.size
+        if offset + RECORD.size > len(self._map):
+            self._grow()
+        RECORD.pack_into(self._map, offset, OUTCOME_CODES[outcome], PREDICTION_CODES[predicted_outcome],
+                         sum(bit for source, bit in SOURCE_BITS if source in prediction['predicted_by']),
+                         is_counter, stats["counter_streak_count"], prediction['confidence'])
+        self._count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, self._count) # After the record: a torn append is never counted
+
+        if predicted_outcome in OUTCOME_CODES:
+            correct = predicted_outcome == outcome
+            stats["total_predictions"] += 1
+            stats["correct_predictions"] += correct
+            stats["prediction_counts"][predicted_outcome] = stats["prediction_counts"].get(predicted_outcome, 0) + 1
+            if correct:
+                stats["prediction_wins"][predicted_outcome] = stats["prediction_wins"].get(predicted_outcome, 0) + 1
+            if is_counter:
+                stats["total_counter_predictions"] += 1
+                stats["correct_counter_predictions"] += correct
+            stats["counter_streak_count"] = stats["counter_streak_count"] + 1 if correct and is_counter else 0
+
+    def pop(self):
+        # Removes the last hand and exactly what it added to the stats -> (outcome, prediction)
+        if not self._count:
+            raise IndexError("pop from empty ledger")
+        self._count -= 1
+        code, predicted, mask, is_counter, streak_before, confidence = RECORD.unpack_from(
+            self._map, HEADER.size + self._count * RECORD.size)
+        HEADER.pack_into(self._map, 0, MAGIC, self._count)
+
+        stats = self.stats
+        if predicted >= 0:
+            correct = predicted == code
+            predicted_outcome = OUTCOMES[predicted]
+            stats["total_predictions"] -= 1
+            stats["correct_predictions"] -= correct
+            self._decrement(stats["prediction_counts"], predicted_outcome)
+            if correct:
+                self._decrement(stats["prediction_wins"], predicted_outcome)
+            if is_counter:
+                stats["total_counter_predictions"] -= 1
+                stats["correct_counter_predictions"] -= correct
+            stats["counter_streak_count"] = streak_before
+        return OUTCOMES[code], _decode_prediction(predicted, mask, is_counter, confidence)
+
+    @staticmethod
+    def _decrement(counts, outcome):
+        # Drops the key at zero so the dict matches one built without the popped hand
+        counts[outcome] -= 1
+        if not counts[outcome]:
+            del counts[outcome]
+
+    def reset(self):
+        self._count = 0
+        HEADER.pack_into(self._map, 0, MAGIC, 0)
+        self.stats = new_stats()
+
+    def flush(self):
+        # Writes the mapped pages to disk (they already survive a crash of this process)
+        self._map.flush()
+
+    def close(self):
+        self._map.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,144 @@
+import bisect
+import os
+import threading
+import time
+
+# --- Engine Metrics ---
+# Counters, timings and confidence histograms that oracle_engine fills while metrics are
+# enabled (oracle_engine.enable_metrics()), exported in the Prometheus text format:
+#
+#   oracle_analyzer_calls_total / oracle_analyzer_fired_total   {analyzer}
+#   oracle_analyzer_skipped_total   {analyzer}: not run because the prediction was already decided
+#   oracle_stage_seconds         histogram per analyzer and the "combine" step {stage}
+#   oracle_confidence            histogram per analyzer that fired and the final "prediction" {source}
+#   oracle_predictions_total     {result: P, B, T, not_enough, no_pattern, unclear}
+#   oracle_counter_overrides_total   predictions decided by the counter-bias short-circuit
+
+ANALYZERS = ("DNA", "Momentum", "Intuition")
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+SECONDS_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3)
+RESULT_LABELS = {"ไม่เพียงพอ": "not_enough", "ไม่พบรูปแบบ": "no_pattern", "ไม่ชัดเจน": "unclear"}
+UNSCORED_RESULTS = ("not_enough", "no_pattern") # No confidence to record
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last bucket: above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        # [(le, count)] including "+Inf", as Prometheus buckets are cumulative
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock() # Streamlit sessions and the service share one instance
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.analyzer_calls = dict.fromkeys(ANALYZERS, 0)
+        self.analyzer_fired = dict.fromkeys(ANALYZERS, 0)
+        self.analyzer_skipped = dict.fromkeys(ANALYZERS, 0)
+        self.seconds = {stage: Histogram(SECONDS_BUCKETS) for stage in ANALYZERS + ("combine",)}
+        self.confidence = {source: Histogram(CONFIDENCE_BUCKETS) for source in ANALYZERS + ("prediction",)}
+        self.results = {}
+        self.counter_overrides = 0
+
+    # -- Recording (called by the engine) --
+
+    def observe_analyzer(self, name, result, seconds):
+        # result: the analyzer's (outcome, confidence[, ...]) tuple
+        with self._lock:
+            self.analyzer_calls[name] = self.analyzer_calls.get(name, 0) + 1
+            self.analyzer_fired.setdefault(name, 0)
+            self.seconds.setdefault(name, Histogram(SECONDS_BUCKETS)).observe(seconds)
+            if result[0]:
+                self.analyzer_fired[name] += 1
+                self.confidence.setdefault(name, Histogram(CONFIDENCE_BUCKETS)).observe(result[1])
+
+    def observe_skipped(self, name):
+        with self._lock:
+            self.analyzer_skipped[name] = self.analyzer_skipped.get(name, 0) + 1
+
+    def observe_prediction(self, prediction, seconds=None, override=False):
+        # seconds: time spent combining the analyzer results (None when they were not combined);
+        # override: decided by a counter result before the other analyzers ran
+        label = RESULT_LABELS.get(prediction["prediction"], prediction["prediction"])
+        with self._lock:
+            self.results[label] = self.results.get(label, 0) + 1
+            if seconds is not None:
+                self.seconds["combine"].observe(seconds)
+            if label not in UNSCORED_RESULTS:
+                self.confidence["prediction"].observe(prediction["confidence"])
+            if override:
+                self.counter_overrides += 1
+
+    # -- Reading --
+
+    def summary(self):
+        # One row per analyzer plus "combine", for display
+        with self._lock:
+            rows = []
+            for stage, histogram in self.seconds.items():
+                calls = histogram.count
+                row = {"stage": stage, "calls": calls,
+                       "mean_us": round(histogram.sum / calls * 1e6, 2) if calls else 0.0}
+                if stage in self.analyzer_fired:
+                    fired = self.analyzer_fired[stage]
+                    row["skipped"] = self.analyzer_skipped.get(stage, 0)
+                    row["fired"] = fired
+                    row["fire_rate"] = round(fired / calls, 4) if calls else 0.0
+                    confidence = self.confidence.get(stage)
+                    row["mean_confidence"] = round(confidence.sum / confidence.count, 4) if confidence and confidence.count else 0.0
+                rows.append(row)
+            return rows
+
+    def prometheus(self):
+        with self._lock:
+            lines = []
+            def family(name, kind, help_text):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            def histogram(name, label, histograms):
+                for value, hist in histograms.items():
+                    for bound, count in hist.cumulative():
+                        lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{label}="{value}"}} {hist.sum!r}')
+                    lines.append(f'{name}_count{{{label}="{value}"}} {hist.count}')
+
+            family("oracle_analyzer_calls_total", "counter", "Analyzer calls")
+            lines.extend(f'oracle_analyzer_calls_total{{analyzer="{name}"}} {count}' for name, count in self.analyzer_calls.items())
+            family("oracle_analyzer_fired_total", "counter", "Analyzer calls that returned an outcome")
+            lines.extend(f'oracle_analyzer_fired_total{{analyzer="{name}"}} {count}' for name, count in self.analyzer_fired.items())
+            family("oracle_analyzer_skipped_total", "counter", "Analyzers not run because the prediction was already decided")
+            lines.extend(f'oracle_analyzer_skipped_total{{analyzer="{name}"}} {count}' for name, count in self.analyzer_skipped.items())
+            family("oracle_stage_seconds", "histogram", "Time per analyzer call and per combine step")
+            histogram("oracle_stage_seconds", "stage", self.seconds)
+            family("oracle_confidence", "histogram", "Confidence of analyzer results and final predictions")
+            histogram("oracle_confidence", "source", self.confidence)
+            family("oracle_predictions_total", "counter", "Predictions by result")
+            lines.extend(f'oracle_predictions_total{{result="{label}"}} {count}' for label, count in self.results.items())
+            family("oracle_counter_overrides_total", "counter", "Predictions decided by the counter-bias short-circuit")
+            lines.append(f"oracle_counter_overrides_total {self.counter_overrides}")
+            family("oracle_metrics_start_time_seconds", "gauge", "When collection started")
+            lines.append(f"oracle_metrics_start_time_seconds {self.started!r}")
+            return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Replaces the file atomically (for node_exporter's textfile collector)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(temporary, path)
@@ -0,0 +1,550 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import os
+import struct
+import threading
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from oracle_engine import (OUTCOME_CODES, DNA_CONTEXT_MIN_LENGTH, DNA_CONTEXT_MAX_LENGTH, DNA_CONTEXT_MIN_MATCHES,
+                           NGRAM_ORDER, NGRAM_DECAY, History, OracleStream, DerivedRoads, DNAIndex, NGramModel,
+                           enable_metrics, get_metrics)
+from oracle_ledger import HandLedger
+
+# --- Multi-Table Prediction Service ---
+# One engine state per table id, served over HTTP/1.1 (keep-alive) and WebSocket from a
+# single asyncio loop with no dependencies beyond the standard library.
+#
+#   python oracle_service.py --port 8765
+#
+#   GET  /tables                      -> {"tables": [ids]}
+#   GET  /tables/<id>                 -> table snapshot
+#   GET  /tables/<id>/hands?start=0&stop=72 -> {"hands": count, "start": start, "outcomes": "PBT..."}
+#                                     (any range of the table's ledger, e.g. one page of a bead plate)
+#   POST /tables/<id>/outcomes        {"outcomes": "PBT"}  (batched push; creates the table) -> snapshot
+#   POST /tables/<id>/undo            {"count": 1}                        -> snapshot
+#   POST /tables/<id>/reset                                               -> snapshot
+#   GET  /tables/<id>/ws              WebSocket: the snapshot is pushed after every change;
+#                                     send {"op": "push", "outcomes": "PB"}, {"op": "undo"} or {"op": "reset"}
+#   GET  /metrics                     engine metrics in the Prometheus text format (with --metrics)
+#
+# Only a push creates a table: every other request for an unknown table id is a 404.
+
+HISTORY_LIMIT = 50 # Hands kept per table (same as MAX_HISTORY_DISPLAY in app.py)
+MAX_REQUEST_BYTES = 1 << 20
+MAX_SUBSCRIBER_BUFFER = 1 << 20 # A WebSocket client this far behind is disconnected
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+LEDGER_SUFFIX = ".ledger"
+CHECKPOINT_SUFFIX = ".checkpoint" # Appended to the ledger's path
+CHECKPOINT_INTERVAL = 10000 # Hands between checkpoints of a table's whole-history structures
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_INTERVAL = 15 # Seconds between writes of --metrics-file
+
+# --- Table State ---
+# The derived roads, the DNA index and the n-gram model cover every hand of a table, and
+# replaying a long ledger through them takes seconds. A table with a ledger file therefore
+# keeps a checkpoint of them next to it (<ledger>.checkpoint: a header with the size of each
+# part, then their checkpoint() bytes), written every CHECKPOINT_INTERVAL hands. Opening the
+# table restores it and replays only the newer hands; a checkpoint that does not match the
+# ledger (hands undone or reset since, other parameters, damage) is ignored.
+
+_CHECKPOINT_HEADER = struct.Struct("<8sQQQ") # magic, sizes of the DerivedRoads, DNAIndex, NGramModel parts
+_CHECKPOINT_MAGIC = b"ORCHKPT1"
+
+def _parse_outcomes(outcomes):
+    outcomes = "".join(outcomes).upper()
+    invalid = set(outcomes) - set(OUTCOME_CODES)
+    if invalid:
+        raise ValueError(f"Unknown outcomes: {''.join(sorted(invalid))}")
+    return outcomes
+
+class TableState:
+    # The per-table part of what app.py used to keep in st.session_state. The hands and
+    # prediction stats live in a HandLedger; the rest is rebuilt from it on start-up.
+    def __init__(self, history_limit=HISTORY_LIMIT, ledger=None):
+        self.history_limit = history_limit
+        self.ledger = HandLedger() if ledger is None else ledger
+        self.checkpoint_path = None if self.ledger.path is None else self.ledger.path + CHECKPOINT_SUFFIX
+        self.version = 0
+        self._rebuild()
+
+    @property
+    def stats(self):
+        return self.ledger.stats
+
+    def _rebuild(self):
+        # History and stream hold the last history_limit hands; the derived roads, the DNA
+        # index and the n-gram model cover every hand
+        recent = self.ledger.outcomes(self.history_limit)
+        self.history = History(recent, max_length=self.history_limit)
+        self.stream = OracleStream(recent, max_length=self.history_limit)
+        (derived_roads, dna_index, ngram), replayed = self._load_whole_history()
+        self.stream.derived_roads = derived_roads
+        # Add their long-horizon signals (NGram, DNAContext) to the stream's predictions
+        self.stream.ngram = ngram
+        self.stream.dna_index = dna_index
+        self.prediction = self.stream.prediction() # Prediction for the next hand
+        self.version += 1
+        if replayed >= CHECKPOINT_INTERVAL:
+            self.save_checkpoint()
+
+    def _load_whole_history(self):
+        # -> ((derived roads, DNA index, n-gram model), hands replayed from the ledger)
+        structures = self._read_checkpoint() or (DerivedRoads(), DNAIndex(), NGramModel())
+        start = len(structures[1])
+        for outcome in self.ledger.outcome_range(start):
+            for structure in structures:
+                structure.push(outcome)
+        return structures, len(self.ledger) - start
+
+    def _read_checkpoint(self):
+        # The checkpointed structures if they match the first hands of the ledger, else None
+        if self.checkpoint_path is None:
+            return None
+        try:
+            with open(self.checkpoint_path, "rb") as f:
+                data = f.read()
+            magic, *sizes = _CHECKPOINT_HEADER.unpack_from(data)
+            if magic != _CHECKPOINT_MAGIC or _CHECKPOINT_HEADER.size + sum(sizes) != len(data):
+                return None
+            parts, offset = [], _CHECKPOINT_HEADER.size
+            for size in sizes:
+                parts.append(data[offset:offset + size])
+                offset += size
+            derived_roads, dna_index, ngram = (DerivedRoads.restore(parts[0]), DNAIndex.restore(parts[1]),
+                                               NGramModel.restore(parts[2]))
+        except (OSError, ValueError, struct.error):
+            return None
+        hands = len(dna_index)
+        if (len(derived_roads) != hands or len(ngram) != hands or hands > len(self.ledger)
+                or (dna_index.min_length, dna_index.max_length) != (DNA_CONTEXT_MIN_LENGTH, DNA_CONTEXT_MAX_LENGTH)
+                or (ngram.order, ngram.decay) != (NGRAM_ORDER, NGRAM_DECAY)
+                or self.ledger.outcome_codes(0, hands) != dna_index.codes()):
+            return None
+        return derived_roads, dna_index, ngram
+
+    def save_checkpoint(self):
+        # Writes the whole-history structures next to the ledger (replacing the old checkpoint at once)
+        if self.checkpoint_path is None:
+            return
+        parts = [self.stream.derived_roads.checkpoint(), self.stream.dna_index.checkpoint(),
+                 self.stream.ngram.checkpoint()]
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(_CHECKPOINT_HEADER.pack(_CHECKPOINT_MAGIC, *(len(part) for part in parts)))
+            for part in parts:
+                f.write(part)
+        os.replace(temporary, self.checkpoint_path)
+
+    def reset(self):
+        self.ledger.reset()
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self._rebuild()
+
+    def record(self, outcome):
+        # Scores the prediction that was showing for this hand, then adds the hand
+        self.ledger.append(outcome, self.prediction)
+        self.history.append(outcome)
+        self.stream.ngram.push(outcome) # Before the stream predicts with them
+        self.stream.dna_index.push(outcome)
+        self.prediction = self.stream.push(outcome)
+        self.version += 1
+        if self.checkpoint_path is not None and not len(self.ledger) % CHECKPOINT_INTERVAL:
+            self.save_checkpoint()
+
+    def undo(self):
+        # Takes back exactly what record() added for the last hand
+        if not len(self.ledger):
+            return
+        self.ledger.pop()
+        self.stream.ngram.pop(self.ledger.outcomes(self.stream.ngram.order))
+        self.stream.dna_index.pop()
+        self.history.pop()
+        self.prediction = self.stream.pop()
+        # Older hands that had dropped out of history and the stream come back at the front
+        stop = len(self.ledger) - len(self.history)
+        older = self.ledger.outcome_range(max(0, len(self.ledger) - self.history_limit), stop)
+        if older:
+            for outcome in reversed(older):
+                self.history.appendleft(outcome)
+                self.stream.push_front(outcome)
+            self.prediction = self.stream.prediction()
+        self.version += 1
+
+    def snapshot(self, table_id):
+        context_length, context_followers = self.stream.dna_index.longest_context(DNA_CONTEXT_MIN_MATCHES)
+        ngram_length, ngram_followers = self.stream.ngram.context()
+        return {
+            "table": table_id,
+            "version": self.version,
+            "hands": len(self.ledger), # Including the ones older than history
+            "history": self.history.window_string(len(self.history)),
+            "prediction": self.prediction,
+            "analysis": dict(self.stream.analysis), # Result of each analyzer the prediction combined
+            "stats": {**self.stats, "prediction_counts": dict(self.stats["prediction_counts"]),
+                      "prediction_wins": dict(self.stats["prediction_wins"])},
+            "signals": {
+                "derived_roads": self.stream.analyze_derived_roads(),
+                "dna_context": {"length": context_length, "followers": context_followers,
+                                "result": self.stream.analyze_dna_context()},
+                "ngram": {"length": ngram_length, "followers": ngram_followers,
+                          "result": self.stream.ngram.analyze()},
+            },
+        }
+
+class TableRegistry:
+    # In-process tables (used by the server, and by app.py when no service URL is set).
+    # With a ledger_dir each table's ledger is the file <ledger_dir>/<quoted id>.ledger;
+    # a stored table is only opened when it is first used.
+    def __init__(self, history_limit=HISTORY_LIMIT, ledger_dir=None):
+        self.history_limit = history_limit
+        self.ledger_dir = ledger_dir
+        self.tables = {} # Open tables
+        self._stored = {} # Ids of the ledger files found at start-up (a dict as an ordered set)
+        self._lock = threading.Lock()
+        if ledger_dir is not None:
+            os.makedirs(ledger_dir, exist_ok=True)
+            self._stored = dict.fromkeys(unquote(name[:-len(LEDGER_SUFFIX)]) for name in sorted(os.listdir(ledger_dir))
+                                         if name.endswith(LEDGER_SUFFIX))
+
+    def __contains__(self, table_id):
+        return table_id in self.tables or table_id in self._stored
+
+    def table(self, table_id, create=False):
+        # KeyError for an unknown table unless `create`
+        state = self.tables.get(table_id)
+        if state is None:
+            if not create and table_id not in self._stored:
+                raise KeyError(table_id)
+            if not table_id:
+                raise ValueError("Empty table id")
+            ledger = None
+            if self.ledger_dir is not None:
+                ledger = HandLedger(os.path.join(self.ledger_dir, quote(table_id, safe="") + LEDGER_SUFFIX))
+            state = self.tables[table_id] = TableState(self.history_limit, ledger)
+        return state
+
+    def table_ids(self):
+        return list({**self._stored, **self.tables})
+
+    def snapshot(self, table_id):
+        with self._lock:
+            return self.table(table_id).snapshot(table_id)
+
+    def hands(self, table_id, start=0, stop=None):
+        with self._lock:
+            ledger = self.table(table_id).ledger
+            start = min(max(0, start), len(ledger))
+            return {"hands": len(ledger), "start": start, "outcomes": ledger.outcome_range(start, stop)}
+
+    def push(self, table_id, outcomes):
+        outcomes = _parse_outcomes(outcomes)
+        with self._lock:
+            state = self.table(table_id, create=True)
+            for outcome in outcomes:
+                state.record(outcome)
+            return state.snapshot(table_id)
+
+    def undo(self, table_id, count=1):
+        with self._lock:
+            state = self.table(table_id)
+            for _ in range(min(count, len(state.ledger))):
+                state.undo()
+            return state.snapshot(table_id)
+
+    def reset(self, table_id):
+        with self._lock:
+            state = self.table(table_id)
+            state.reset()
+            return state.snapshot(table_id)
+
+    def metrics_text(self):
+        # Prometheus text of this process's engine metrics ("" while they are disabled)
+        metrics = get_metrics()
+        return metrics.prometheus() if metrics is not None else ""
+
+# --- Client ---
+
+class ServiceClient:
+    # Same methods as TableRegistry, over one keep-alive HTTP connection to the service
+    def __init__(self, url, timeout=5):
+        parts = urlsplit(url)
+        self._connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        self._lock = threading.Lock()
+
+    def _request(self, method, path, payload=None, raw=False):
+        body = None if payload is None else json.dumps(payload)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        with self._lock:
+            for attempt in (0, 1): # Reconnect once if the server closed the idle connection
+                try:
+                    self._connection.request(method, path, body, headers)
+                    response = self._connection.getresponse()
+                    data = response.read()
+                    if raw and response.status == 200:
+                        return data.decode("utf-8")
+                    data = json.loads(data or b"null")
+                    break
+                except (ConnectionError, http.client.HTTPException):
+                    self._connection.close()
+                    if attempt:
+                        raise
+        if response.status == 404 and path.startswith("/tables/"): # Same as TableRegistry for an unknown table
+            raise KeyError(unquote(path.split("/")[2].split("?")[0]))
+        if response.status != 200:
+            raise ValueError(data.get("error", f"HTTP {response.status}") if isinstance(data, dict) else response.status)
+        return data
+
+    def _table_path(self, table_id, action=""):
+        return f"/tables/{quote(str(table_id), safe='')}" + (f"/{action}" if action else "")
+
+    def table_ids(self):
+        return self._request("GET", "/tables")["tables"]
+
+    def snapshot(self, table_id):
+        return self._request("GET", self._table_path(table_id))
+
+    def hands(self, table_id, start=0, stop=None):
+        query = f"?start={start}" + (f"&stop={stop}" if stop is not None else "")
+        return self._request("GET", self._table_path(table_id, "hands") + query)
+
+    def push(self, table_id, outcomes):
+        if not table_id:
+            raise ValueError("Empty table id")
+        return self._request("POST", self._table_path(table_id, "outcomes"), {"outcomes": "".join(outcomes)})
+
+    def undo(self, table_id, count=1):
+        return self._request("POST", self._table_path(table_id, "undo"), {"count": count})
+
+    def reset(self, table_id):
+        return self._request("POST", self._table_path(table_id, "reset"), {})
+
+    def metrics_text(self):
+        return self._request("GET", "/metrics", raw=True)
+
+# --- Server ---
+
+def _websocket_frame(payload, opcode=0x1):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+async def _read_websocket_frame(reader):
+    # (opcode, payload) of one client frame; client frames are always masked
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_REQUEST_BYTES:
+        raise ValueError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    data = await reader.readexactly(length)
+    key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+    return first & 0x0F, (int.from_bytes(data, "big") ^ key).to_bytes(length, "big")
+
+class OracleService:
+    def __init__(self, history_limit=HISTORY_LIMIT, ledger_dir=None):
+        self.tables = TableRegistry(history_limit, ledger_dir)
+        self._subscribers = {} # table id -> set of StreamWriters
+
+    # -- Requests --
+
+    def _apply(self, table_id, op, payload):
+        if op == "push" or op == "outcomes":
+            return self.tables.push(table_id, payload.get("outcomes", ""))
+        if op == "undo":
+            return self.tables.undo(table_id, int(payload.get("count", 1)))
+        if op == "reset":
+            return self.tables.reset(table_id)
+        raise LookupError(op)
+
+    def _route(self, method, path, body):
+        # -> (status, response object)
+        path, _, query = path.partition("?")
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[0] != "tables" or len(parts) > 3 or (len(parts) > 1 and not parts[1]):
+            return 404, {"error": "not found"}
+        if len(parts) == 1:
+            return (200, {"tables": self.tables.table_ids()}) if method == "GET" else (405, {"error": "method not allowed"})
+        table_id = parts[1]
+        try:
+            if len(parts) == 2:
+                return (200, self.tables.snapshot(table_id)) if method == "GET" else (405, {"error": "method not allowed"})
+            if parts[2] == "hands":
+                if method != "GET":
+                    return 405, {"error": "method not allowed"}
+                try:
+                    query = {name: int(values[-1]) for name, values in parse_qs(query).items() if name in ("start", "stop")}
+                except ValueError as e:
+                    return 400, {"error": str(e)}
+                return 200, self.tables.hands(table_id, **query)
+        except KeyError:
+            return 404, {"error": "unknown table"}
+        if method != "POST":
+            return 405, {"error": "method not allowed"}
+        try:
+            payload = json.loads(body or b"{}")
+            snapshot = self._apply(table_id, parts[2], payload if isinstance(payload, dict) else {})
+        except KeyError:
+            return 404, {"error": "unknown table"}
+        except LookupError:
+            return 404, {"error": "not found"}
+        except (ValueError, TypeError) as e: # Also json.JSONDecodeError
+            return 400, {"error": str(e)}
+        self._broadcast(table_id, snapshot)
+        return 200, snapshot
+
+    def _metrics_response(self):
+        text = self.tables.metrics_text()
+        if not text:
+            return 404, "application/json; charset=utf-8", b'{"error": "metrics are disabled"}'
+        return 200, METRICS_CONTENT_TYPE, text.encode()
+
+    def _broadcast(self, table_id, snapshot):
+        subscribers = self._subscribers.get(table_id)
+        if not subscribers:
+            return
+        frame = _websocket_frame(json.dumps(snapshot, ensure_ascii=False).encode())
+        for writer in list(subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                subscribers.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    # -- Connections --
+
+    @staticmethod
+    def _response(status, content_type, data, keep_alive):
+        return (f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + data
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_REQUEST_BYTES:
+                    writer.write(self._response(400 if length < 0 else 413, "application/json; charset=utf-8",
+                                                b'{"error": "bad Content-Length"}', False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length)
+
+                if headers.get("upgrade", "").lower() == "websocket" and path.rstrip("/").endswith("/ws"):
+                    table_id = unquote(path.split("?", 1)[0].strip("/").split("/")[1])
+                    if table_id in self.tables:
+                        await self._websocket(reader, writer, headers, table_id)
+                    else:
+                        writer.write(self._response(404, "application/json; charset=utf-8",
+                                                    b'{"error": "unknown table"}', False))
+                        await writer.drain()
+                    break
+
+                if path.split("?", 1)[0] == "/metrics" and method == "GET":
+                    status, content_type, data = self._metrics_response()
+                else:
+                    status, response = self._route(method, path, body)
+                    content_type = "application/json; charset=utf-8"
+                    data = json.dumps(response, ensure_ascii=False).encode()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(self._response(status, content_type, data, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _websocket(self, reader, writer, headers, table_id):
+        accept = base64.b64encode(hashlib.sha1((headers.get("sec-websocket-key", "") + WEBSOCKET_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        subscribers = self._subscribers.setdefault(table_id, set())
+        subscribers.add(writer)
+        try:
+            writer.write(_websocket_frame(json.dumps(self.tables.snapshot(table_id), ensure_ascii=False).encode()))
+            while True:
+                opcode, data = await _read_websocket_frame(reader)
+                if opcode == 0x8: # Close
+                    writer.write(_websocket_frame(data[:2], 0x8))
+                    break
+                if opcode == 0x9: # Ping
+                    writer.write(_websocket_frame(data, 0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                try:
+                    message = json.loads(data)
+                    self._broadcast(table_id, self._apply(table_id, message.get("op"), message))
+                except (ValueError, TypeError, LookupError, AttributeError) as e:
+                    writer.write(_websocket_frame(json.dumps({"error": str(e) or "unknown op"}).encode()))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            subscribers.discard(writer)
+            if not subscribers:
+                self._subscribers.pop(table_id, None)
+
+    async def _write_metrics(self, path, interval):
+        while True:
+            await asyncio.sleep(interval)
+            get_metrics().write_prometheus(path)
+
+    async def serve(self, host="127.0.0.1", port=8765, metrics_file=None, metrics_interval=METRICS_INTERVAL):
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_REQUEST_BYTES)
+        if metrics_file is not None: # Held in self so the task is not garbage collected
+            self._metrics_writer = asyncio.create_task(self._write_metrics(metrics_file, metrics_interval))
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Oracle predictions for many tables")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--history-limit", type=int, default=HISTORY_LIMIT, help="Hands kept per table")
+    parser.add_argument("--ledger-dir", help="Directory of per-table hand ledgers (default: in memory only)")
+    parser.add_argument("--metrics", action="store_true", help="Collect engine metrics and serve them at /metrics")
+    parser.add_argument("--metrics-file", help="Also write the metrics to this file (Prometheus textfile format)")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL, help="Seconds between metrics file writes")
+    args = parser.parse_args(argv)
+    if args.metrics or args.metrics_file:
+        enable_metrics()
+    try:
+        asyncio.run(OracleService(args.history_limit, args.ledger_dir).serve(
+            args.host, args.port, args.metrics_file, args.metrics_interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
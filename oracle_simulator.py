@@ -0,0 +1,138 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from oracle_engine import OUTCOME_CODES
+from oracle_backtest import PAD
+
+# --- Card-Level Shoe Simulator ---
+# Deals complete 8-deck shoes with the standard (Punto Banco) drawing rules: burn cards,
+# naturals, the player's third card, the banker's third-card table and the cut card.
+# Every shoe of a chunk is dealt at once with NumPy, hand by hand, straight into the
+# (shoes x hands) int8 array of OUTCOME_CODES that oracle_backtest.backtest() takes
+# (PAD after the last hand of a shoe).
+#
+#   python oracle_simulator.py --shoes 1000000 --seed 7 --output shoes.npy --workers 8
+#
+# Chunk i of a seed always uses the random stream SeedSequence(seed, spawn_key=(i,)),
+# so the output is the same whatever the number of workers.
+
+P, B, T = OUTCOME_CODES['P'], OUTCOME_CODES['B'], OUTCOME_CODES['T']
+DECKS = 8
+CUT_CARD = 16 # Cards left behind the cut card; no new hand starts once it is reached
+CHUNK_SIZE = 65536 # Shoes dealt together (about 27 MB of shuffled cards)
+MIN_CUT_CARD = 6 # A hand uses at most 6 cards
+
+def _banker_draw_table():
+    # BANKER_DRAWS[banker total, player's third card] (column 10: the player stood)
+    table = np.zeros((10, 11), dtype=bool)
+    table[:6, 10] = True # Banker draws on 0-5 when the player stood
+    for third in range(10):
+        table[:3, third] = True
+        table[3, third] = third != 8
+        table[4, third] = 2 <= third <= 7
+        table[5, third] = 4 <= third <= 7
+        table[6, third] = 6 <= third <= 7
+    return table
+
+BANKER_DRAWS = _banker_draw_table()
+
+def max_hands(decks=DECKS, cut_card=CUT_CARD, burn=True):
+    # Upper bound on the hands of one shoe (every hand uses at least 4 cards, the burn at least 2)
+    return -(-(decks * 52 - cut_card - (2 if burn else 0)) // 4)
+
+def deal_shoes(ranks, cut_card=CUT_CARD, burn=True, out=None):
+    # ranks: (shoes x cards) shuffled card ranks 1..13 -> (shoes x max_hands) outcome codes
+    count, cards = ranks.shape
+    if cut_card < MIN_CUT_CARD:
+        raise ValueError(f"cut_card must be at least {MIN_CUT_CARD} cards")
+    width = -(-(cards - cut_card - (2 if burn else 0)) // 4)
+    if out is None:
+        out = np.empty((count, width), dtype=np.int8)
+    out[...] = PAD
+    values = (np.minimum(ranks, 10) % 10).astype(np.int8) # Tens and faces count 0
+    rows = np.arange(count)
+    # Burn: the first card is turned over and as many cards as its value (faces = 10) are discarded
+    position = (1 + np.minimum(ranks[:, 0], 10)).astype(np.intp) if burn else np.zeros(count, dtype=np.intp)
+    limit = cards - cut_card
+
+    for hand in range(width):
+        active = position < limit
+        if not active.any():
+            break
+        dealt = values[rows[:, None], np.minimum(position[:, None] + np.arange(6), cards - 1)]
+        player = (dealt[:, 0] + dealt[:, 2]) % 10 # Cards go player, banker, player, banker
+        banker = (dealt[:, 1] + dealt[:, 3]) % 10
+        natural = (player >= 8) | (banker >= 8)
+        player_draws = ~natural & (player <= 5)
+        player_third = dealt[:, 4]
+        player = np.where(player_draws, (player + player_third) % 10, player)
+        banker_draws = ~natural & BANKER_DRAWS[banker, np.where(player_draws, player_third, 10)]
+        banker_third = np.where(player_draws, dealt[:, 5], dealt[:, 4])
+        banker = np.where(banker_draws, (banker + banker_third) % 10, banker)
+
+        outcome = np.where(player > banker, P, np.where(banker > player, B, T))
+        out[:, hand] = np.where(active, outcome, PAD)
+        position += active * (4 + player_draws + banker_draws)
+    return out
+
+def _shuffled_ranks(rng, count, decks):
+    deck = np.tile(np.arange(1, 14, dtype=np.int8), 4 * decks)
+    return rng.permuted(np.broadcast_to(deck, (count, len(deck))), axis=1)
+
+def simulate_chunk(seed, chunk, count, decks=DECKS, cut_card=CUT_CARD, burn=True, out=None):
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+    return deal_shoes(_shuffled_ranks(rng, count, decks), cut_card, burn, out)
+
+def _chunks(shoes, chunk_size):
+    return [(chunk, start, min(chunk_size, shoes - start)) for chunk, start in enumerate(range(0, shoes, chunk_size))]
+
+def simulate_shoes(shoes, seed=0, decks=DECKS, cut_card=CUT_CARD, burn=True, chunk_size=CHUNK_SIZE):
+    # (shoes x max_hands) int8 outcome codes, PAD after the end of each shoe
+    out = np.empty((shoes, max_hands(decks, cut_card, burn)), dtype=np.int8)
+    for chunk, start, count in _chunks(shoes, chunk_size):
+        simulate_chunk(seed, chunk, count, decks, cut_card, burn, out[start:start + count])
+    return out
+
+def _simulate_into(path, seed, chunk, start, count, decks, cut_card, burn):
+    shoes = np.load(path, mmap_mode="r+")
+    simulate_chunk(seed, chunk, count, decks, cut_card, burn, shoes[start:start + count])
+    shoes.flush()
+
+def simulate_to_file(path, shoes, seed=0, decks=DECKS, cut_card=CUT_CARD, burn=True,
+                     chunk_size=CHUNK_SIZE, workers=None):
+    # Writes the same array as simulate_shoes() to a .npy file. Worker processes deal
+    # disjoint chunks directly into the memory-mapped file, so nothing large is pickled.
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.int8, shape=(shoes, max_hands(decks, cut_card, burn)))
+    del out # Header written; workers reopen the file
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_simulate_into, path, seed, chunk, start, count, decks, cut_card, burn)
+                   for chunk, start, count in _chunks(shoes, chunk_size)]
+        for future in futures:
+            future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deal simulated baccarat shoes into a .npy array of outcome codes")
+    parser.add_argument("--shoes", type=int, required=True, help="Number of shoes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, default=DECKS)
+    parser.add_argument("--cut-card", type=int, default=CUT_CARD, help="Cards left behind the cut card")
+    parser.add_argument("--no-burn", action="store_true", help="Do not burn cards at the start of the shoe")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", required=True, help=".npy file to write")
+    args = parser.parse_args(argv)
+    if args.cut_card < MIN_CUT_CARD:
+        parser.error(f"--cut-card must be at least {MIN_CUT_CARD}")
+
+    simulate_to_file(args.output, args.shoes, args.seed, args.decks, args.cut_card, not args.no_burn, workers=args.workers)
+    shoes = np.load(args.output, mmap_mode="r")
+    hands = int((shoes != PAD).sum())
+    counts = {outcome: int((shoes == code).sum()) for outcome, code in OUTCOME_CODES.items()}
+    print(f"{args.shoes} shoes, {hands} hands -> {args.output}", file=sys.stderr)
+    print("  " + ", ".join(f"{outcome} {count / hands:.4f}" for outcome, count in counts.items()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
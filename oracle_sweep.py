@@ -0,0 +1,125 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from oracle_engine import DEFAULT_CONFIG, EngineConfig
+from oracle_backtest import backtest_totals, encode_shoes
+
+# --- Parameter Sweep ---
+# Runs the vectorized backtest for many EngineConfig values across CPU cores.
+# The shoe corpus is placed in shared memory once; workers attach to it instead
+# of receiving a pickled copy, and each task only carries its config. Workers only
+# count totals, one block of shoes at a time, so their memory does not grow with the corpus.
+#
+#   python oracle_sweep.py --shoes shoes.npy --set prediction_threshold=0.5,0.55,0.6 \
+#       --set dna_pattern_length=4,5,6 --output sweep.csv
+
+RESULT_FIELDS = list(EngineConfig._fields) + [
+    "hands", "predictions", "accuracy", "coverage", "counter_predictions", "counter_hit_rate"]
+
+_shared_shoes = None # Worker-side view of the corpus
+
+
+def load_shoes(path):
+    # .npy: (n_shoes, n_hands) int8 array of OUTCOME_CODES (-1 padded);
+    # anything else: a text file with one shoe per line such as "PBBPT..."
+    if path.endswith(".npy"):
+        return np.ascontiguousarray(np.load(path), dtype=np.int8)
+    with open(path, encoding="utf-8") as f:
+        return encode_shoes([line.strip().upper() for line in f if line.strip()])
+
+
+def build_configs(settings, samples=None, seed=None):
+    # settings: ["name=v1,v2", ...] -> every combination (or `samples` random ones)
+    grid = {}
+    for setting in settings:
+        name, _, values = setting.partition("=")
+        name = name.strip()
+        if name not in EngineConfig._fields:
+            raise ValueError(f"Unknown config field: {name}")
+        cast = type(getattr(DEFAULT_CONFIG, name))
+        grid[name] = [cast(value) for value in values.split(",") if value.strip()]
+    names = list(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    if samples is not None and samples < len(combinations):
+        combinations = random.Random(seed).sample(combinations, samples)
+    configs = [DEFAULT_CONFIG._replace(**dict(zip(names, values))) for values in combinations]
+    for config in configs:
+        if not 1 <= config.dna_pattern_length <= config.max_history_for_analysis <= 56:
+            raise ValueError(f"Unsupported config: {config}")
+    return configs
+
+
+def _attach(name, shape, dtype):
+    global _shared_shoes
+    memory = shared_memory.SharedMemory(name=name)
+    _shared_shoes = (memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+
+
+def _run(config):
+    shoes = _shared_shoes[1]
+    result = backtest_totals(shoes, config=config)
+    hands = result["total_hands"]
+    predictions = result["total_predictions"]
+    counter_predictions = result["total_counter_predictions"]
+    return list(config) + [
+        hands, predictions, round(result["accuracy"], 6),
+        round(predictions / hands, 6) if hands else 0.0,
+        counter_predictions,
+        round(result["correct_counter_predictions"] / counter_predictions, 6) if counter_predictions else 0.0]
+
+
+def run_sweep(shoes, configs, output, workers=None):
+    # Rows are written as configs finish, so a long sweep can be inspected (or
+    # interrupted) while it runs. Returns the number of rows written.
+    shoes = np.ascontiguousarray(shoes, dtype=np.int8)
+    memory = shared_memory.SharedMemory(create=True, size=max(shoes.nbytes, 1))
+    try:
+        np.ndarray(shoes.shape, dtype=shoes.dtype, buffer=memory.buf)[...] = shoes
+        writer = csv.writer(output)
+        writer.writerow(RESULT_FIELDS)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(memory.name, shoes.shape, shoes.dtype)) as pool:
+            futures = [pool.submit(_run, config) for config in configs]
+            for future in as_completed(futures):
+                writer.writerow(future.result())
+                output.flush()
+        return len(futures)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest a grid of Oracle engine configurations")
+    parser.add_argument("--shoes", required=True, help=".npy array of outcome codes, or a text file with one shoe per line")
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=V1,V2",
+                        help=f"Values to sweep for one of: {', '.join(EngineConfig._fields)}")
+    parser.add_argument("--random", type=int, metavar="N", help="Sample N configs from the grid instead of running all")
+    parser.add_argument("--seed", type=int, help="Seed for --random")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output", default="-", help="Results CSV (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        configs = build_configs(args.set, args.random, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    shoes = load_shoes(args.shoes)
+    if args.output == "-":
+        run_sweep(shoes, configs, sys.stdout, args.workers)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            count = run_sweep(shoes, configs, f, args.workers)
+        print(f"{count} configs -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
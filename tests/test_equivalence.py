@@ -0,0 +1,233 @@
+import random
+import struct
+
+import pytest
+
+from benchmarks.shoes import SHOE_KINDS, generate_shoe
+from oracle_backtest import backtest, backtest_totals, encode_shoes, prediction_at
+from oracle_engine import (ANALYZER_REGISTRY, DEFAULT_CONFIG, AnalysisWindow, AnalyzerRegistry, BigRoad, DerivedRoads,
+                           DNAIndex, NGramModel, OracleStream, analyze_dna_pattern, analyze_intuition, analyze_momentum,
+                           combine_results, intuition_from_road, momentum_from_road, predict_outcome)
+from oracle_ledger import HandLedger, replay_stats
+
+# The incremental and vectorized paths claim the same results as the plain ones;
+# these compare them on seeded random shoes of every generator shape.
+
+CONFIGS = [
+    DEFAULT_CONFIG,
+    DEFAULT_CONFIG._replace(dna_pattern_length=3, min_history_for_prediction=8),
+    DEFAULT_CONFIG._replace(max_history_for_analysis=20, prediction_threshold=0.6,
+                            counter_bias_streak_threshold=2),
+    DEFAULT_CONFIG._replace(counter_bias_streak_threshold=1),
+    DEFAULT_CONFIG._replace(counter_bias_streak_threshold=1, counter_prediction_threshold=0.9, dna_pattern_length=2,
+                            max_history_for_analysis=12, min_history_for_prediction=5),
+    DEFAULT_CONFIG._replace(min_history_for_prediction=0),
+]
+
+def shoes(count=8, hands=90):
+    return [generate_shoe(kind, hands, seed) for kind in SHOE_KINDS for seed in range(count)]
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_stream_matches_predict_outcome(config):
+    rng = random.Random(1)
+    for shoe in shoes(4):
+        stream = OracleStream(config=config)
+        history = ""
+        for outcome in shoe:
+            history += outcome
+            assert stream.push(outcome) == predict_outcome(history, config)
+            if rng.random() < 0.2: # Undo, then put the hand back
+                assert stream.pop() == predict_outcome(history[:-1], config)
+                assert stream.push(outcome) == predict_outcome(history, config)
+
+def test_bounded_stream_matches_predict_outcome():
+    for shoe in shoes(2, 120):
+        stream = OracleStream(max_length=40)
+        for i, outcome in enumerate(shoe):
+            assert stream.push(outcome) == predict_outcome(shoe[max(0, i + 1 - 40):i + 1])
+
+def test_bounded_stream_refills_front_after_pop():
+    rng = random.Random(7)
+    for shoe in shoes(2, 120):
+        stream = OracleStream(max_length=30)
+        end = 0
+        while end < len(shoe):
+            stream.push(shoe[end])
+            end += 1
+            if rng.random() < 0.3 and end > 30:
+                stream.pop() # Then put back the hand that had dropped out
+                end -= 1
+                stream.push_front(shoe[end - 30])
+                assert len(stream) == 30
+                assert stream.prediction() == predict_outcome(shoe[end - 30:end])
+        with pytest.raises(IndexError):
+            stream.push_front("P")
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_string_analyzers_match_whole_road(config):
+    # analyze_momentum / analyze_intuition only build a road of the tail they need
+    for shoe in shoes(3, 300):
+        for end in range(len(shoe) + 1):
+            road = BigRoad(shoe[:end])
+            assert analyze_momentum(shoe[:end], config) == momentum_from_road(road, config)
+            assert analyze_intuition(shoe[:end], config) == intuition_from_road(road, config)
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_backtest_matches_predict_outcome(config):
+    batch = shoes(6, 80) + ["PPTTPTPTBBPPT", "PB", ""] # Shorter shoes are padded
+    result = backtest(encode_shoes(batch), block_size=7, config=config)
+    made = correct = 0
+    for row, shoe in enumerate(batch):
+        for hand in range(len(shoe)):
+            expected = predict_outcome(shoe[:hand], config)
+            assert prediction_at(result, row, hand) == expected
+            if expected["prediction"] in "PBT":
+                made += 1
+                correct += expected["prediction"] == shoe[hand]
+    assert (result["total_predictions"], result["correct_predictions"]) == (made, correct)
+    totals = backtest_totals(encode_shoes(batch), block_size=5, config=config)
+    assert totals == {name: result[name] for name in totals}
+
+def test_ledger_stats_match_replay(tmp_path):
+    rng = random.Random(2)
+    path = str(tmp_path / "table.ledger")
+    ledger = HandLedger(path)
+    history = ""
+    for shoe in shoes(2):
+        for outcome in shoe:
+            ledger.append(outcome, predict_outcome(history))
+            history += outcome
+            if rng.random() < 0.15:
+                assert ledger.pop()[0] == history[-1]
+                history = history[:-1]
+            assert ledger.stats == replay_stats(ledger.records())
+    ledger.flush()
+    ledger.close()
+    reopened = HandLedger(path)
+    assert len(reopened) == len(history) and reopened.outcomes() == history
+    assert reopened.stats == replay_stats(reopened.records())
+    reopened.close()
+
+def test_dna_index_undo_matches_fresh_index():
+    rng = random.Random(3)
+    for shoe in shoes(2, 150):
+        index = DNAIndex()
+        history = ""
+        for outcome in shoe:
+            index.push(outcome)
+            history += outcome
+            if rng.random() < 0.3:
+                for _ in range(rng.randint(1, min(12, len(history)))):
+                    assert index.pop() == history[-1]
+                    history = history[:-1]
+            fresh = DNAIndex(history)
+            for length in range(index.min_length, index.max_length + 1):
+                assert index.followers(length) == fresh.followers(length)
+            assert index.analyze() == fresh.analyze()
+
+def test_dna_index_matches_full_history_scan():
+    k = DEFAULT_CONFIG.dna_pattern_length
+    for shoe in shoes(2, 120):
+        index = DNAIndex(min_length=k, max_length=k)
+        for i, outcome in enumerate(shoe):
+            index.push(outcome)
+            expected = analyze_dna_pattern(shoe[:i + 1], DEFAULT_CONFIG)
+            assert index.analyze() == expected
+
+def test_derived_roads_match_hand_worked_example():
+    # Big road columns B2 P3 B1 P1 B2, with ties that must not add entries
+    roads = DerivedRoads("BBTPPPBTPBB")
+    assert {name: list(entries) for name, entries in roads.entries.items()} == {
+        "Big Eye Boy": [1, 0, 0, 0, 1, 0],
+        "Small Road": [0, 0, 0],
+        "Cockroach Pig": [0, 1],
+    }
+    assert roads.analyze_all() == {
+        "Big Eye Boy": ("P", 4 / 6), # Mostly blue; a new P column would be blue, another B red
+        "Small Road": ("P", 1.0),
+        "Cockroach Pig": (None, 0), # One red, one blue
+    }
+
+def same_roads(roads, other):
+    return vars(roads) == vars(other)
+
+def test_derived_roads_undo_matches_fresh_roads():
+    rng = random.Random(5)
+    for shoe in shoes(2, 150):
+        roads = DerivedRoads()
+        history = ""
+        for outcome in shoe:
+            roads.push(outcome)
+            history += outcome
+            if rng.random() < 0.3:
+                for _ in range(rng.randint(1, min(12, len(history)))):
+                    assert roads.pop() == history[-1]
+                    history = history[:-1]
+            assert same_roads(roads, DerivedRoads(history))
+
+def test_derived_roads_checkpoint_round_trip():
+    for shoe in shoes(1, 120) + ["", "TT", "TPT"]:
+        roads = DerivedRoads(shoe)
+        restored = DerivedRoads.restore(roads.checkpoint())
+        assert same_roads(restored, roads)
+        for outcome in "PBTBB": # Both keep going the same way, and undo the same way
+            roads.push(outcome)
+            restored.push(outcome)
+        for _ in range(len(shoe) + 5):
+            assert restored.pop() == roads.pop()
+            assert same_roads(restored, roads)
+    with pytest.raises((ValueError, struct.error)): # What TableState treats as a corrupt checkpoint
+        DerivedRoads.restore(DerivedRoads("PBBP").checkpoint()[:-1])
+
+def full_evaluation(registry, source, config, window_length=None):
+    # Every analyzer run and combined, with no short-circuit
+    window_length = len(source) if window_length is None else window_length
+    results = [(spec.name, spec.analyze(source)) for spec in registry.specs() if window_length >= spec.min_history]
+    return combine_results(results, config)
+
+def test_lazy_evaluation_matches_full_evaluation():
+    # A weak optional analyzer that agrees with Momentum can only pull the average down
+    registry = AnalyzerRegistry()
+    for spec in ANALYZER_REGISTRY.specs():
+        registry.register(*spec)
+    registry.register("Weak", lambda source: (source.analyze_momentum()[0], 0.3), priority=40, max_confidence=0.3)
+    rng = random.Random(4)
+    for config in CONFIGS:
+        for _ in range(1500):
+            window = AnalysisWindow("".join(rng.choices("PBT", (45, 46, 9), k=config.max_history_for_analysis)), config)
+            lazy = registry.evaluate(window, len(window), config)[1]
+            full = full_evaluation(registry, window, config)
+            assert (lazy["prediction"], lazy["is_counter"]) == (full["prediction"], full["is_counter"])
+
+def test_optional_analyzers_are_skipped_only_when_they_cannot_matter():
+    # NGram and DNAContext over the whole history, as a TableState's stream carries them
+    skipped = {"NGram": 0, "DNAContext": 0}
+    for shoe in shoes(4, 200):
+        stream = OracleStream()
+        stream.ngram, stream.dna_index = NGramModel(), DNAIndex()
+        for outcome in shoe:
+            stream.ngram.push(outcome)
+            stream.dna_index.push(outcome)
+            stream.push(outcome)
+            window_length = len(stream.history_string())
+            if window_length < DEFAULT_CONFIG.min_history_for_prediction:
+                continue
+            results, lazy = ANALYZER_REGISTRY.evaluate(stream, window_length)
+            full = full_evaluation(ANALYZER_REGISTRY, stream, DEFAULT_CONFIG, window_length)
+            assert (lazy["prediction"], lazy["is_counter"]) == (full["prediction"], full["is_counter"])
+            for name in skipped:
+                skipped[name] += name not in results and not lazy["is_counter"] # Not the counter override
+    assert all(skipped.values())
+
+def test_analyzers_only_run_for_sources_with_what_they_require():
+    registry = AnalyzerRegistry()
+    for spec in ANALYZER_REGISTRY.specs():
+        registry.register(*spec)
+    calls = []
+    registry.register("Extra", lambda source: calls.append(source) or (None, 0), priority=50, requires=("extra",))
+    window = AnalysisWindow("") # Nothing fires, so no optional analyzer is settled early
+    assert set(registry.evaluate(window, 30)[0]) == {"DNA", "Momentum", "Intuition"} # No .ngram, .dna_index, .extra
+    assert not calls
+    window.extra, window.ngram = object(), NGramModel()
+    assert set(registry.evaluate(window, 30)[0]) == {"DNA", "Momentum", "Intuition", "NGram", "Extra"}
+    assert calls == [window]
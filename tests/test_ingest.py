@@ -0,0 +1,35 @@
+import random
+
+import pandas as pd
+
+from benchmarks.shoes import SHOE_KINDS, generate_shoe
+from oracle_backtest import STATUS_TEXT
+from oracle_engine import OUTCOMES, predict_outcome
+from oracle_ingest import iter_predictions
+
+def test_interleaved_tables_match_predict_outcome(tmp_path):
+    # Hands of several tables interleaved in one file, read in chunks much smaller than a table
+    rng = random.Random(8)
+    histories = {f"t{i}": generate_shoe(kind, rng.randint(0, 90), i) for i, kind in enumerate([*SHOE_KINDS] * 2)}
+    pending = {table: list(history) for table, history in histories.items() if history}
+    rows = []
+    while pending:
+        table = rng.choice(sorted(pending))
+        rows.append((table, {"P": "Player", "B": "b", "T": " T "}[pending[table].pop(0)]))
+        if not pending[table]:
+            del pending[table]
+    rows.insert(5, ("t0", "?")) # Not an outcome: dropped
+    path = str(tmp_path / "hands.csv")
+    pd.DataFrame(rows, columns=["table", "outcome"]).to_csv(path, index=False)
+
+    skipped = {}
+    seen = {table: "" for table in histories}
+    chunks = list(iter_predictions([path], chunk_size=7, skipped=skipped))
+    assert skipped == {"rows": 1} and len(chunks) == -(-len(rows) // 7)
+    for chunk in chunks:
+        for table, outcome, prediction, confidence, is_counter in chunk.itertuples(index=False):
+            expected = predict_outcome(seen[table])
+            assert (STATUS_TEXT.get(prediction) or OUTCOMES[prediction]) == expected["prediction"]
+            assert (confidence, is_counter) == (expected["confidence"], expected["is_counter"])
+            seen[table] += OUTCOMES[outcome]
+    assert seen == histories
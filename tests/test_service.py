@@ -0,0 +1,81 @@
+import json
+import random
+
+import pytest
+
+import oracle_service
+from oracle_service import CHECKPOINT_SUFFIX, OracleService, TableRegistry, TableState
+
+def route(service, method, path, payload=None):
+    status, response = service._route(method, path, None if payload is None else json.dumps(payload).encode())
+    return status, response
+
+def test_only_a_push_creates_a_table(tmp_path):
+    service = OracleService(ledger_dir=str(tmp_path))
+    for method, path in (("GET", "/tables/a"), ("GET", "/tables/a/hands?start=0"),
+                         ("POST", "/tables/a/undo"), ("POST", "/tables/a/reset")):
+        assert route(service, method, path, {} if method == "POST" else None) == (404, {"error": "unknown table"})
+    assert route(service, "GET", "/tables") == (200, {"tables": []})
+    assert not list(tmp_path.iterdir())
+
+    status, snapshot = route(service, "POST", "/tables/a/outcomes", {"outcomes": "PBT"})
+    assert status == 200 and snapshot["hands"] == 3
+    assert route(service, "GET", "/tables/a/hands?start=1")[1]["outcomes"] == "BT"
+    assert [path.name for path in tmp_path.iterdir()] == ["a.ledger"]
+    assert OracleService(ledger_dir=str(tmp_path)).tables.snapshot("a")["history"] == "PBT"
+
+def assert_same_table(snapshot, expected):
+    # Ignoring the version, and the float rounding an n-gram undo leaves in its weights
+    ngram, expected_ngram = snapshot["signals"].pop("ngram"), expected["signals"].pop("ngram")
+    assert {**snapshot, "version": None} == {**expected, "version": None}
+    assert ngram["followers"] == pytest.approx(expected_ngram["followers"])
+    assert ngram["result"] == pytest.approx(expected_ngram["result"])
+
+def test_snapshot_carries_the_analysis_behind_its_prediction():
+    rng = random.Random(7)
+    table = TableState()
+    assert table.snapshot("a")["analysis"] == {} # Not enough hands yet
+    for _ in range(300):
+        table.record(rng.choice("PBT"))
+        snapshot = table.snapshot("a")
+        analysis, prediction = snapshot["analysis"], snapshot["prediction"]
+        assert set(prediction["predicted_by"]) <= set(analysis)
+        if prediction["prediction"] in "PBT":
+            assert all(analysis[name][0] == prediction["prediction"] for name in prediction["predicted_by"])
+
+def test_undo_matches_recording_fewer_hands():
+    # Past history_limit hands an undo refills the front of the window from the ledger
+    rng = random.Random(6)
+    table = TableState(history_limit=12)
+    history = ""
+    for _ in range(200):
+        outcome = rng.choice("PBT")
+        table.record(outcome)
+        history += outcome
+        if rng.random() < 0.3:
+            for _ in range(rng.randint(1, 15)):
+                table.undo()
+                history = history[:-1]
+            fresh = TableState(history_limit=12)
+            for outcome in history:
+                fresh.record(outcome)
+            assert_same_table(table.snapshot("a"), fresh.snapshot("a"))
+
+def test_tables_reopen_from_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(oracle_service, "CHECKPOINT_INTERVAL", 10)
+    rng = random.Random(5)
+    registry = TableRegistry(ledger_dir=str(tmp_path))
+    registry.push("a", "".join(rng.choices("PBT", k=25)))
+    assert (tmp_path / ("a.ledger" + CHECKPOINT_SUFFIX)).exists() # Written at hand 20
+    expected = registry.snapshot("a")
+    reopened = TableRegistry(ledger_dir=str(tmp_path))
+    assert reopened.tables == {} and reopened.table_ids() == ["a"] # Opened on first use
+    assert_same_table(reopened.snapshot("a"), expected)
+
+    # Undoing past the checkpoint leaves it stale: the table is replayed from the ledger instead
+    # (and checkpointed again)
+    reopened.undo("a", 8)
+    snapshot = reopened.push("a", "PP")
+    state = TableRegistry(ledger_dir=str(tmp_path)).table("a")
+    assert_same_table(state.snapshot("a"), snapshot)
+    assert len(state._read_checkpoint()[1]) == 19
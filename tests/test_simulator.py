@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from oracle_backtest import PAD
+from oracle_engine import OUTCOMES
+from oracle_simulator import B, P, deal_shoes, max_hands, simulate_shoes, simulate_to_file
+
+# deal_shoes() deals every shoe of a chunk at once; these check it against the drawing
+# rules written out hand by hand for one shoe.
+
+def banker_draws(banker, player_third):
+    # The banker's rule as printed on the layout (player_third None: the player stood)
+    if player_third is None:
+        return banker <= 5
+    return (banker <= 2 or (banker == 3 and player_third != 8) or (banker == 4 and 2 <= player_third <= 7)
+            or (banker == 5 and 4 <= player_third <= 7) or (banker == 6 and 6 <= player_third <= 7))
+
+def reference_shoe(ranks, cut_card, burn):
+    values = [min(rank, 10) % 10 for rank in ranks]
+    position = 1 + min(ranks[0], 10) if burn else 0
+    outcomes = ""
+    while position < len(ranks) - cut_card:
+        player = (values[position] + values[position + 2]) % 10
+        banker = (values[position + 1] + values[position + 3]) % 10
+        position += 4
+        if player < 8 and banker < 8: # No natural
+            player_third = None
+            if player <= 5:
+                player_third = values[position]
+                player = (player + player_third) % 10
+                position += 1
+            if banker_draws(banker, player_third):
+                banker = (banker + values[position]) % 10
+                position += 1
+        outcomes += "P" if player > banker else "B" if banker > player else "T"
+    return outcomes
+
+def decode(row):
+    return "".join(OUTCOMES[code] for code in row if code != PAD)
+
+def test_hand_worked_shoe():
+    # Natural 9 for the player; then player 5 draws a 6 (-> 1) and banker 6 draws on it (-> 8).
+    # The cut card is reached after those 10 cards.
+    ranks = np.array([[4, 1, 5, 1, 2, 3, 3, 3, 6, 2, 1, 1, 1, 1, 1, 1]])
+    assert deal_shoes(ranks, cut_card=6, burn=False).tolist() == [[P, B, PAD]]
+    assert reference_shoe(ranks[0].tolist(), 6, False) == "PB"
+
+@pytest.mark.parametrize("decks, cut_card, burn", [(1, 6, False), (1, 6, True), (8, 16, True), (8, 40, False)])
+def test_deal_shoes_matches_reference(decks, cut_card, burn):
+    rng = np.random.default_rng(11)
+    deck = np.tile(np.arange(1, 14, dtype=np.int8), 4 * decks)
+    ranks = np.array([rng.permutation(deck) for _ in range(200)])
+    ranks[:13, 0] = np.arange(1, 14) # Every burn card value
+    dealt = deal_shoes(ranks, cut_card, burn)
+    assert dealt.shape[1] == max_hands(decks, cut_card, burn)
+    for shoe, row in zip(ranks, dealt):
+        assert decode(row) == reference_shoe(shoe.tolist(), cut_card, burn)
+        assert (row[len(decode(row)):] == PAD).all()
+
+def test_deal_shoes_rejects_a_short_cut_card():
+    with pytest.raises(ValueError):
+        deal_shoes(np.ones((1, 52), dtype=np.int8), cut_card=5)
+
+def test_seeded_shoes_are_reproducible(tmp_path):
+    shoes = simulate_shoes(50, seed=3, chunk_size=16)
+    assert np.array_equal(shoes, simulate_shoes(50, seed=3, chunk_size=16))
+    assert not np.array_equal(shoes, simulate_shoes(50, seed=4, chunk_size=16))
+    path = str(tmp_path / "shoes.npy")
+    simulate_to_file(path, 50, seed=3, chunk_size=16, workers=2) # Chunks dealt by other processes
+    assert np.array_equal(np.load(path), shoes)